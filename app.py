@@ -1,12 +1,18 @@
-from flask import Flask, render_template, request, jsonify, send_file
-from utils.gnews_scraper import news_scraper_RSS_links
-from utils.playwright_rssLinksResolver_optimized import GoogleNewsLinkResolverOptimized
-from utils.articleContentExtractor import extract_content_sync
-from utils.gemini_analyser_async import process_articles_sync
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context
+from utils.streaming_pipeline import ScrapeScorePipeline
+from utils.batch_pipeline import BatchScrapeScore, unique_companies
+from utils.playwright_browserPool import get_browser_pool
+from utils.gemini_scheduler import get_gemini_scheduler
+from utils.relevance_filter import RelevanceFilter
+from utils.job_queue import get_job_queue
+from utils.metrics import get_metrics
 from utils.QnA_extractor import extract_qna_data, convert_df_to_json
 from utils.gemini_reportGen import generate_financial_report
 from utils.markdown2htmlreport import markdown_to_html
 import pandas as pd
+import hashlib
+import io
+import os
 import logging
 import time
 import json
@@ -17,92 +23,162 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Articles per Gemini request of the scraper-score pipelines; values above 1 enable batching mode
+GEMINI_BATCH_SIZE = int(os.getenv("GEMINI_BATCH_SIZE", "1"))
+# Analyse articles without the per-date chat history by default; requests can override it with 'stateless'
+GEMINI_STATELESS = os.getenv("GEMINI_STATELESS", "0").lower() in ("1", "true", "yes")
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/scraper-score', methods=['POST'])
-def scraper_score():
-    data = request.get_json()
-    company_name = data['companyName']
-    time_period = data['timePeriod']
-    logger.info("Received data: %s", data)
-
-    start_time = time.time()
-
-    # Fetch news data (RSS links as placeholder)
-    gnews_rss_df = news_scraper_RSS_links(company_name, time_period)
-    logger.info("Fetched articles - rss links: %s", gnews_rss_df.head())
+def request_stateless(data):
+    """
+    :return: The request's 'stateless' flag, or GEMINI_STATELESS if it has none.
+    """
+    return bool(data.get('stateless', GEMINI_STATELESS))
 
-    gnews_rss_df.to_excel("gnews_scrapped_debug.xlsx", index=False)
+def run_scraper_score(company_name, time_period, on_event=None, stateless=GEMINI_STATELESS):
+    """
+    Scrape, resolve, extract and analyse the articles of a company as one streaming pipeline.
 
-    # Resolve the RSS links to actual links
-    rss_links = gnews_rss_df["Link"].tolist()
-    resolver = GoogleNewsLinkResolverOptimized(max_pages=20)
-    resolved_links = resolver.resolve_links_sync(rss_links)
-    gnews_rss_df["ResolvedLink"] = gnews_rss_df["Link"].map(resolved_links.get)
-
-    gnews_rss_df = gnews_rss_df.dropna()
-    gnews_rss_df.to_excel("resolved_links_debug.xlsx", index=False)
-
-    logger.info("Fetched articles - resolved links: %s", gnews_rss_df.head())
-    logger.info("Resolved links: %s out of %s", gnews_rss_df['ResolvedLink'].notnull().sum(), len(gnews_rss_df))
-    logger.info("Link resolver completed in : %s seconds", time.time() - start_time)
+    :return: Response dictionary with the analysed articles as JSON records under 'data'.
+    """
+    start_time = time.time()
 
-    # Extract content
-    article_links = gnews_rss_df["ResolvedLink"].tolist()
-    extracted_contents = extract_content_sync(article_links)
-    gnews_rss_df["Content"] = gnews_rss_df["ResolvedLink"].map(extracted_contents.get)
-    gnews_rss_df = gnews_rss_df.dropna()
+    pipeline = ScrapeScorePipeline(company_name, time_period, resolve_workers=20,
+                                   relevance_filter=RelevanceFilter(company_name), on_event=on_event,
+                                   batch_size=GEMINI_BATCH_SIZE, stateless=stateless)
+    analysed_df = pipeline.run_sync()
+    analysed_df.to_excel("gemini_analysed_debug.xlsx", index=False)
 
-    gnews_rss_df.to_excel("trafilatura_debug.xlsx", index=False)
+    logger.info("Articles per stage: %s", dict(pipeline.stage_counts))
+    logger.info("Analysis completed in : %s seconds", time.time() - start_time)
 
-    logger.info("Content extraction completed in : %s seconds", time.time() - start_time)
-    logger.info("Fetched articles with content: %s", gnews_rss_df.head())
+    response = analysed_response(company_name, analysed_df)
+    # Per-stage timers of this request: count, total and max seconds of searches, resolves, downloads, Gemini calls...
+    response['timings'] = pipeline.timings.summary()
+    # Gemini tokens used and saved by the cache, with the analysis mode they were used in
+    response['tokens'] = pipeline.token_usage()
 
-    # Analyse the articles using Gemini API
-    analysed_df = process_articles_sync(gnews_rss_df, company_name)
-    analysed_df.to_excel("gemini_analysed_debug.xlsx", index=False)
+    with open('debugging_response.json', 'w') as f:
+        json.dump(response, f)
 
-    logger.info("Analysis completed in : %s seconds", time.time() - start_time)
+    return response
 
+def analysed_response(company_name, analysed_df):
     # Convert DataFrame to JSON for response
     analysedData = analysed_df.to_json(orient='records')
 
     # Prepare response
-    response = {
+    return {
         'status': 'success',
         'message': "Sentiment analysis request received successfully",
         'companyName': company_name,
         'data': analysedData
     }
 
-    with open('debugging_response.json', 'w') as f:
-        json.dump(response, f)
+def run_batch_scraper_score(company_names, time_period, on_event=None, stateless=GEMINI_STATELESS):
+    """
+    Scrape and score several companies in one batch, sharing link resolution, downloads and Gemini slots.
 
-    return jsonify(response)
+    :return: Response dictionary with one scraper-score response per company under 'results'.
+    """
+    start_time = time.time()
 
-@app.route('/generate-report', methods=['POST'])
-def generate_report():
+    batch = BatchScrapeScore(company_names, time_period, on_event=on_event, batch_size=GEMINI_BATCH_SIZE,
+                             stateless=stateless)
+    results = {}
+    for company_name, outcome in batch.run_sync().items():
+        if isinstance(outcome, BaseException):
+            results[company_name] = {'status': 'error', 'companyName': company_name, 'message': str(outcome)}
+        else:
+            results[company_name] = analysed_response(company_name, outcome)
+        results[company_name]['timings'] = batch.pipelines[company_name].timings.summary()
+        results[company_name]['tokens'] = batch.pipelines[company_name].token_usage()
+
+    logger.info("Batch of %d companies completed in %.2f seconds", len(results), time.time() - start_time)
+    return {
+        'status': 'success',
+        'timePeriod': time_period,
+        'results': results,
+        'sharedFetches': batch.shared_stats,
+        'timings': batch.timings.summary()
+    }
+
+@app.route('/scraper-score', methods=['POST'])
+def scraper_score():
     data = request.get_json()
     company_name = data['companyName']
-    analysedData = data['analysedData']  # Get the analysed data directly
+    time_period = data['timePeriod']
+    logger.info("Received data: %s", data)
 
-    logger.info("Generating report for company: %s", company_name)
+    return jsonify(run_scraper_score(company_name, time_period, stateless=request_stateless(data)))
 
+@app.route('/scraper-score/batch', methods=['POST'])
+def scraper_score_batch():
+    data = request.get_json()
+    company_names = data['companies']
+    time_period = data['timePeriod']
+    logger.info("Received batch of %d companies: %s", len(company_names), data)
+
+    return jsonify(run_batch_scraper_score(company_names, time_period, stateless=request_stateless(data)))
+
+@app.route('/scraper-score/stream', methods=['POST'])
+def scraper_score_stream():
+    data = request.get_json()
+    company_name = data['companyName']
+    time_period = data['timePeriod']
+    logger.info("Received streaming request: %s", data)
+
+    pipeline = ScrapeScorePipeline(company_name, time_period, resolve_workers=20,
+                                   relevance_filter=RelevanceFilter(company_name), batch_size=GEMINI_BATCH_SIZE,
+                                   stateless=request_stateless(data))
+
+    # One JSON event per line (NDJSON): progress, each analysed article as soon as it is scored, then 'complete'.
+    # Events are written out as they come instead of being collected into one response body.
+    def generate():
+        yield json.dumps({'type': 'start', 'companyName': company_name}) + "\n"
+        for event in pipeline.iter_events():
+            yield json.dumps(event, default=str) + "\n"
+        logger.info("Articles per stage: %s", dict(pipeline.stage_counts))
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/resolver-stats', methods=['GET'])
+def resolver_stats():
+    # Pool size, adaptive concurrency limit and per-link latency histogram of the shared link resolver
+    return jsonify(get_browser_pool().stats())
+
+@app.route('/gemini-stats', methods=['GET'])
+def gemini_stats():
+    # Quota headroom, calls in flight and latency histogram of the process-wide Gemini scheduler
+    return jsonify(get_gemini_scheduler().stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Process-wide timers, histograms and counters in the Prometheus text format, for scraping
+    return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
+
+def run_generate_report(company_name, analysedData, on_stage=None):
+    """
+    Generate the financial report of a company from its analysed articles.
+
+    :param on_stage: Optional callback receiving the name of each step as it starts
+    :return: The report as HTML.
+    """
+    on_stage = on_stage or (lambda stage: None)
     start_time = time.time()
 
     # Convert the list of JSON objects into a pandas DataFrame
-    try:
-        # Use json_normalize if the data structure requires flattening
-        analysed_df = pd.json_normalize(analysedData)
-    except Exception as e:
-        logger.error("Error converting analysedData to DataFrame: %s", e)
-        return jsonify({"error": "Error processing data", "message": str(e)}), 500
+    # Use json_normalize if the data structure requires flattening
+    analysed_df = pd.json_normalize(analysedData)
 
     logger.info("Analyzed data converted to DataFrame")
 
     # Extract QnA data
+    on_stage("qna")
     QnA_df = extract_qna_data(analysed_df)
     logger.info("QnA df: %s", QnA_df.head())
 
@@ -116,26 +192,131 @@ def generate_report():
     logger.info("ReportGen input: %s", reportGen_input[:100] + "...")
 
     logger.info("Generating report for: %s", company_name)
-    
+
     # Extract the financial report in markdown format
+    on_stage("report")
     financial_report = generate_financial_report(company_name, reportGen_input)
 
     with open('financial_report_debug.txt', 'w', encoding="utf-8") as f:
         f.write(financial_report)
 
     # Convert the markdown into html format
+    on_stage("html")
     html_report = markdown_to_html(financial_report)
 
+    logger.info("Report generated in %.2f seconds", time.time() - start_time)
+    return html_report
+
+@app.route('/generate-report', methods=['POST'])
+def generate_report():
+    data = request.get_json()
+    company_name = data['companyName']
+    analysedData = data['analysedData']  # Get the analysed data directly
+
+    logger.info("Generating report for company: %s", company_name)
+
+    try:
+        html_report = run_generate_report(company_name, analysedData)
+    except Exception as e:
+        logger.error("Error generating report: %s", e)
+        return jsonify({"error": "Error processing data", "message": str(e)}), 500
+
     # Save the HTML output to a file
     output_path = "financial_report.html"
     with open(output_path, "w", encoding="utf-8") as html_file:
         html_file.write(html_report)
 
-    logger.info("Report generated in %.2f seconds", time.time() - start_time)
-
     # Send the HTML file to the frontend for download
     return send_file(output_path, as_attachment=True, download_name=f"{company_name}_financial_report.html", mimetype='text/html')
 
+# Background jobs: submitting returns a job id at once, the work runs on the job queue's workers,
+# and clients poll /jobs/<id> until the result is ready. Identical in-flight requests share one job.
+def scraper_score_job(job, company_name, time_period, stateless):
+    def on_event(event):
+        if event["type"] == "progress":
+            job.update_progress(event["counts"])
+
+    return run_scraper_score(company_name, time_period, on_event=on_event, stateless=stateless)
+
+def scraper_score_batch_job(job, company_names, time_period, stateless):
+    def on_event(event):
+        if event["type"] == "progress":
+            job.set_progress(event["company"], event["counts"])
+
+    return run_batch_scraper_score(company_names, time_period, on_event=on_event, stateless=stateless)
+
+def generate_report_job(job, company_name, analysedData):
+    return run_generate_report(company_name, analysedData, on_stage=lambda stage: job.set_progress("stage", stage))
+
+def job_accepted(job, merged):
+    response = {**job.to_dict(), 'merged': merged, 'statusUrl': f"/jobs/{job.id}", 'resultUrl': f"/jobs/{job.id}/result"}
+    return jsonify(response), 202
+
+@app.route('/jobs/scraper-score', methods=['POST'])
+def submit_scraper_score():
+    data = request.get_json()
+    company_name = data['companyName']
+    time_period = data['timePeriod']
+    stateless = request_stateless(data)
+    logger.info("Received scraper-score job: %s", data)
+
+    job, merged = get_job_queue().submit('scraper-score', (company_name, time_period, stateless), scraper_score_job,
+                                         company_name, time_period, stateless)
+    return job_accepted(job, merged)
+
+@app.route('/jobs/scraper-score-batch', methods=['POST'])
+def submit_scraper_score_batch():
+    data = request.get_json()
+    company_names = data['companies']
+    time_period = data['timePeriod']
+    logger.info("Received scraper-score batch job of %d companies", len(company_names))
+
+    stateless = request_stateless(data)
+    key = (tuple(sorted(name.lower() for name in unique_companies(company_names))), time_period, stateless)
+    job, merged = get_job_queue().submit('scraper-score-batch', key, scraper_score_batch_job,
+                                         company_names, time_period, stateless)
+    return job_accepted(job, merged)
+
+@app.route('/jobs/generate-report', methods=['POST'])
+def submit_generate_report():
+    data = request.get_json()
+    company_name = data['companyName']
+    analysedData = data['analysedData']
+    logger.info("Received generate-report job for company: %s", company_name)
+
+    data_hash = hashlib.sha256(json.dumps(analysedData, sort_keys=True).encode('utf-8')).hexdigest()
+    job, merged = get_job_queue().submit('generate-report', (company_name, data_hash), generate_report_job,
+                                         company_name, analysedData)
+    return job_accepted(job, merged)
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job", "jobId": job_id}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job", "jobId": job_id}), 404
+    if job.status == 'failed':
+        return jsonify(job.to_dict()), 500
+    if not job.done:
+        # Not ready yet: same body as the status endpoint
+        return jsonify(job.to_dict()), 202
+
+    if job.kind == 'generate-report':
+        company_name = job.key[0]
+        return send_file(io.BytesIO(job.result.encode('utf-8')), as_attachment=True,
+                         download_name=f"{company_name}_financial_report.html", mimetype='text/html')
+    return jsonify(job.result)
+
+@app.route('/job-stats', methods=['GET'])
+def job_stats():
+    # Number of background jobs per status
+    return jsonify(get_job_queue().stats())
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
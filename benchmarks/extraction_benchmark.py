@@ -0,0 +1,75 @@
+"""
+Benchmark Trafilatura extraction throughput on a saved corpus of HTML pages.
+
+Compares parsing inline on the event loop (the previous behaviour) with parsing in the
+process pool from utils.extraction_pool, and reports articles/second for each.
+
+Usage (from the repository root):
+    python -m benchmarks.extraction_benchmark --corpus path/to/html_pages --repeat 3
+"""
+import argparse
+import asyncio
+import glob
+import os
+import time
+
+from trafilatura import extract
+
+from utils.extraction_pool import extract_with_trafilatura_pooled, get_process_pool, trafilatura_extract
+
+
+def load_corpus(corpus_dir):
+    paths = sorted(glob.glob(os.path.join(corpus_dir, "*.htm*")))
+    pages = []
+    for path in paths:
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+async def run_inline(pages):
+    # Previous behaviour: trafilatura.extract runs inside the coroutine and blocks the event loop
+    async def parse(page):
+        return extract(page)
+
+    return await asyncio.gather(*(parse(page) for page in pages))
+
+
+async def run_pooled(pages):
+    return await asyncio.gather(*(extract_with_trafilatura_pooled(page) for page in pages))
+
+
+def benchmark(name, runner, pages, repeat):
+    best = float("inf")
+    extracted = 0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        results = asyncio.run(runner(pages))
+        best = min(best, time.perf_counter() - start_time)
+        extracted = sum(1 for result in results if result)
+
+    print(f"{name:<8} {len(pages) / best:8.1f} articles/s  (best of {repeat}: {best:.2f}s, extracted {extracted}/{len(pages)})")
+    return len(pages) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", required=True, help="Directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per mode; the best run is reported")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        raise SystemExit(f"No .html files found in {args.corpus}")
+    print(f"Corpus: {len(pages)} pages, {sum(map(len, pages)) / 1e6:.1f} MB, {os.cpu_count()} cores")
+
+    # Start the worker processes outside the timed runs
+    list(get_process_pool().map(trafilatura_extract, pages[:os.cpu_count() or 1]))
+
+    before = benchmark("inline", run_inline, pages, args.repeat)
+    after = benchmark("pooled", run_pooled, pages, args.repeat)
+    print(f"Speed-up: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark post-processing of parsed Gemini results on synthetic rows.
+
+Compares formatting every 'Q' cell through Series.apply and ast.literal_eval (the previous
+behaviour) with the whole-column formatting of utils.result_formatting, and reports rows/second
+for each. With dict values both are bound by the per-cell dict lookups and run about even.
+Pass --strings to store the 'Q' values as JSON strings, as in results read back from a file,
+which is where literal_eval was paid for and json.loads makes the difference.
+
+Usage (from the repository root):
+    python -m benchmarks.result_formatting_benchmark --rows 10000 --repeat 5
+"""
+import argparse
+import ast
+import json
+import random
+import time
+
+import pandas as pd
+
+from utils.result_formatting import format_q_columns
+
+QUESTIONS = [f"Q{i}" for i in range(1, 10)]
+
+
+def synthetic_results(rows, seed=1):
+    rng = random.Random(seed)
+    results = []
+    for i in range(rows):
+        result = {
+            "headline": f"Synthetic headline {i}",
+            "positive_sentiment": rng.uniform(0, 100),
+            "negative_sentiment": rng.uniform(0, 100),
+            "neutral_sentiment": rng.uniform(0, 100),
+            "red_flag_score": rng.randint(0, 10),
+            "tags": ["earnings", "debt"][:rng.randint(0, 2)],
+            "unique_id": rng.randint(1, 20),
+            "date": f"2024-01-{rng.randint(1, 28):02d}",
+            "link": f"https://example.com/{i}",
+        }
+        for question in QUESTIONS:
+            if rng.random() < 0.5:
+                result[question] = {"categorical": "N/A", "text": "N/A"}
+            else:
+                result[question] = {"categorical": rng.choice(["Yes", "No"]), "text": f"Explanation {i}"}
+        results.append(result)
+    return results
+
+
+def run_apply(results_df):
+    # Previous behaviour: one literal_eval / dict lookup per cell through Series.apply
+    def format_q_value(value):
+        try:
+            data_dict = ast.literal_eval(value) if isinstance(value, str) else value
+        except ValueError:
+            return "Invalid data format"
+        categorical = data_dict.get("categorical", "N/A")
+        text = data_dict.get("text", "N/A")
+        if categorical == "N/A" and text == "N/A":
+            return "N/A"
+        return categorical if text == "N/A" else f"{categorical}\n{text}"
+
+    results_df = results_df.copy()
+    for col in [col for col in results_df.columns if col.startswith("Q")]:
+        results_df[col] = results_df[col].apply(format_q_value)
+    return results_df
+
+
+def run_columnar(results_df):
+    return format_q_columns(results_df)
+
+
+def benchmark(name, runner, data, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        output = runner(data)
+        best = min(best, time.perf_counter() - start_time)
+
+    print(f"{name:<9} {rows / best:10.0f} rows/s  (best of {repeat}: {best * 1000:.1f}ms)")
+    return output, rows / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Number of synthetic result rows")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per mode; the best run is reported")
+    parser.add_argument("--strings", action="store_true",
+                        help="Store 'Q' values as strings, as when results are read back from a file")
+    args = parser.parse_args()
+
+    results = synthetic_results(args.rows)
+    if args.strings:
+        # JSON strings are also valid Python literals, so both modes can read them
+        results = [{**result, **{q: json.dumps(result[q]) for q in QUESTIONS}} for result in results]
+    print(f"Results: {len(results)} rows, {len(QUESTIONS)} question columns")
+
+    # Assembling the DataFrame from the parsed results is the same in both modes
+    results_df, _ = benchmark("assemble", pd.DataFrame, results, len(results), args.repeat)
+    before_df, before = benchmark("apply", run_apply, results_df, len(results), args.repeat)
+    after_df, after = benchmark("columnar", run_columnar, results_df, len(results), args.repeat)
+    assert before_df[QUESTIONS].equals(after_df[QUESTIONS]), "Formatted 'Q' columns differ between modes"
+    print(f"Speed-up: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
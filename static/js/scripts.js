@@ -16,6 +16,10 @@ function analyzeSentiment() {
     analyzeButton.classList.add('analyzing');
     analyzeButton.disabled = true;
 
+    // Hide the report button until the run is complete
+    const generateReportButton = document.querySelector('.generate-btn');
+    generateReportButton.disabled = true;
+
     // Show loading animation
     document.getElementById('loading').style.display = 'block';
     document.getElementById('gauge-loading').style.display = 'block';
@@ -25,272 +29,368 @@ function analyzeSentiment() {
     document.getElementById('company-name-display').textContent = companyName;
     document.getElementById('date-range').textContent = document.getElementById('time-period').selectedOptions[0].textContent;
 
-    fetch('/scraper-score', {
+    // Articles arrive one by one; the charts are redrawn at most every RENDER_INTERVAL ms
+    const sentimentData = [];
+    let updateGauge = null;
+    let renderTimer = null;
+    let introEndsAt = 0;
+
+    function render() {
+        clearTimeout(renderTimer);
+        renderTimer = null;
+        if (sentimentData.length === 0) {
+            return;
+        }
+        if (Date.now() < introEndsAt) {
+            // Let the opening animations finish before updating the charts in place
+            renderTimer = setTimeout(render, introEndsAt - Date.now());
+            return;
+        }
+
+        if (updateGauge === null) {
+            // First articles: replace the loading animations with the charts
+            clearLoader();
+            document.getElementById('loading').style.display = 'none';
+            document.getElementById('gauge-loading').style.display = 'none';
+            renderSentimentChart(sentimentData, true);
+            updateGauge = createSentimentGaugeChart("pie-chart", sentimentData);
+            introEndsAt = Date.now() + INTRO_ANIMATION_DURATION;
+        } else {
+            renderSentimentChart(sentimentData, false);
+            updateGauge(sentimentData);
+        }
+        updateScoreCards(sentimentData);
+    }
+
+    function scheduleRender() {
+        if (renderTimer === null) {
+            renderTimer = setTimeout(render, RENDER_INTERVAL);
+        }
+    }
+
+    function handleEvent(event) {
+        switch (event.type) {
+            case 'progress':
+                showPipelineProgress(event.counts, updateGauge === null ? null : analyzeButton);
+                break;
+            case 'article':
+                sentimentData[event.seq] = event.record;
+                scheduleRender();
+                break;
+            case 'complete':
+                // Stateless runs assign story ids once every article is known
+                if (event.unique_ids) {
+                    event.unique_ids.forEach((uniqueId, seq) => {
+                        if (sentimentData[seq]) {
+                            sentimentData[seq].unique_id = uniqueId;
+                        }
+                    });
+                }
+                render();
+                break;
+            case 'error':
+                throw new Error(event.message);
+        }
+    }
+
+    fetch('/scraper-score/stream', {
         method: 'POST',
         body: JSON.stringify({ companyName, timePeriod }),
         headers: { 'Content-Type': 'application/json' }
     })
-    .then(response => response.json())
-    .then(response => {
-        const companyName = response.companyName;
-        const sentimentData = JSON.parse(response.data);
-
+    .then(response => readEventStream(response, handleEvent))
+    .then(() => {
         // Reset the analysebutton style
         analyzeButton.innerText = 'Analyze Sentiment';
         analyzeButton.classList.remove('analyzing');
         analyzeButton.disabled = false;
 
+        // Enable the "Generate Report" button once all the sentiment data is received
+        const analysedData = sentimentData.filter(d => d);
+        if (analysedData.length > 0) {
+            generateReportButton.disabled = false;
+            generateReportButton.style.display = 'block';
+            generateReportButton.onclick = function() {
+                generateReport(companyName, analysedData);
+            };
+        }
+    })
+    .finally(() => {
+        // Hide loading animation, also when no article could be analysed
+        clearLoader();
+        document.getElementById('loading').style.display = 'none';
+        document.getElementById('gauge-loading').style.display = 'none';
+    })
+    .catch(error => {
+        console.error('Error:', error);
 
-        // Enable the "Generate Report" button once the sentiment data is received
-        const generateReportButton = document.querySelector('.generate-btn');
-        generateReportButton.disabled = false;
-        generateReportButton.style.display = 'block';
-        generateReportButton.onclick = function() {
-            generateReport(companyName, sentimentData);
-        };
+        // re-enable
+        analyzeButton.innerText = 'Analyse Sentiment';
+        analyzeButton.classList.remove('analyzing');
+        analyzeButton.disabled = false;
 
-        // Find the highest positive_sentiment and highest negative_sentiment along with their corresponding date
-        const highestPositive = sentimentData.reduce((max, current) => max.positive_sentiment > current.positive_sentiment ? max : current);
-        const highestNegative = sentimentData.reduce((max, current) => max.negative_sentiment > current.negative_sentiment ? max : current);
-
-        // Update the Negative Score and Postive score with dates
-        document.getElementById('Best_score').textContent = highestPositive.positive_sentiment + "%";
-        document.getElementById('Worst_score').textContent = highestNegative.negative_sentiment + "%";
-        document.getElementById('Best_score_date').textContent = highestPositive.date;
-        document.getElementById('Worst_score_date').textContent = highestNegative.date;
-
-        // Add click event listener to Best_score_date
-        document.getElementById('Best_score_date').addEventListener('click', () => {
-            const date = highestPositive.date;
-            const sentimentDataForDate = sentimentData.filter(d => d.date === date);
-            const articleHeadings = sentimentDataForDate.map(d => d.headline);
-            const articleLinks = sentimentDataForDate.map(d => d.link);
-            const positiveScores = sentimentDataForDate.map(d => d.positive_sentiment);
-            const negativeScores = sentimentDataForDate.map(d => d.negative_sentiment);
-
-            const positiveLinks = [];
-            for (let i = 0; i < articleHeadings.length; i++) {
-                if (positiveScores[i] > negativeScores[i]) {
-                    positiveLinks.push(`<li><a href="${articleLinks[i]}" target="_blank">${articleHeadings[i]}</a></li>`);
-                }
+        document.getElementById('loading').style.display = 'none'; // Ensure to hide animation on error
+        document.getElementById('gauge-loading').style.display = 'none';
+        clearLoader();
+    });
+}
+
+const RENDER_INTERVAL = 500;
+const INTRO_ANIMATION_DURATION = 2100; // Chart bars and gauge animate in over about two seconds
+
+// Read a newline-delimited JSON response and pass each event to onEvent as soon as its line arrives
+async function readEventStream(response, onEvent) {
+    if (!response.ok) {
+        throw new Error(`Request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+
+        if (done) {
+            if (buffer.trim()) {
+                onEvent(JSON.parse(buffer));
             }
+            return;
+        }
+    }
+}
 
-            document.getElementById('positive_links').innerHTML = `
-                <h3>Positive Articles</h3>
-                <ul>${positiveLinks.join('')}</ul>
-            `;
-        });
+// Pipeline stages as reported by the server, in the order of processingStages
+const pipelineStages = ['rss', 'resolve', 'extract', 'analyse'];
 
-        // Add click event listener to Worst_score_date
-        document.getElementById('Worst_score_date').addEventListener('click', () => {
-            const date = highestNegative.date;
-            const sentimentDataForDate = sentimentData.filter(d => d.date === date);
-            const articleHeadings = sentimentDataForDate.map(d => d.headline);
-            const articleLinks = sentimentDataForDate.map(d => d.link);
-            const positiveScores = sentimentDataForDate.map(d => d.positive_sentiment);
-            const negativeScores = sentimentDataForDate.map(d => d.negative_sentiment);
-
-            const negativeLinks = [];
-            for (let i = 0; i < articleHeadings.length; i++) {
-                if (negativeScores[i] > positiveScores[i]) {
-                    negativeLinks.push(`<li><a href="${articleLinks[i]}" target="_blank">${articleHeadings[i]}</a></li>`);
-                }
+// Show the real pipeline progress in the loader, or on the analyse button once the charts are shown
+function showPipelineProgress(counts, analyzeButton) {
+    const found = counts.rss || 0;
+    const analysed = counts.analyse || 0;
+
+    if (analyzeButton) {
+        analyzeButton.innerText = `Analyzing... ${analysed}/${found}`;
+        return;
+    }
+
+    // The server now reports progress, so stop the timed animation
+    if (progressInterval) {
+        clearInterval(progressInterval);
+        progressInterval = null;
+    }
+
+    const activeStage = pipelineStages.reduce((active, stage, index) => (counts[stage] ? index : active), 0);
+    const currentStage = processingStages[activeStage];
+    const stageCount = counts[pipelineStages[activeStage]] || 0;
+    const previousCount = activeStage === 0 ? stageCount : (counts[pipelineStages[activeStage - 1]] || 0);
+
+    loaderIcon.textContent = currentStage.icon;
+    stageText.textContent = currentStage.text;
+    stageDescription.textContent = `${stageCount} of ${found} articles`;
+
+    const overallProgress = found ? Math.min((analysed / found) * 100, 100) : 0;
+    const stageProgress = previousCount ? Math.min((stageCount / previousCount) * 100, 100) : 0;
+
+    overallProgressBar.style.width = `${overallProgress}%`;
+    overallProgressText.textContent = `${Math.round(overallProgress)}%`;
+    stageProgressBar.style.width = `${stageProgress}%`;
+    stageProgressText.textContent = `${Math.round(stageProgress)}%`;
+}
+
+// Show the articles of one date, split into positive and negative, optionally one per story (unique_id).
+// Only the lists named in `lists` are updated; the other one keeps the articles it shows
+function showArticleLinks(sentimentData, date, uniqueStories, dateLabel, lists = ['positive', 'negative']) {
+    const sentimentDataForDate = sentimentData.filter(d => d.date === date);
+
+    const positiveLinks = [];
+    const negativeLinks = [];
+    const uniquePositiveIds = new Set(); // Set to track unique positive IDs
+    const uniqueNegativeIds = new Set(); // Set to track unique negative IDs
+
+    sentimentDataForDate.forEach(d => {
+        const link = `<li><a href="${d.link}" target="_blank">${d.headline}</a></li>`;
+        if (d.positive_sentiment > d.negative_sentiment) {
+            if (!uniqueStories || !uniquePositiveIds.has(d.unique_id)) {
+                uniquePositiveIds.add(d.unique_id);
+                positiveLinks.push(link);
+            }
+        } else if (d.negative_sentiment > d.positive_sentiment) {
+            if (!uniqueStories || !uniqueNegativeIds.has(d.unique_id)) {
+                uniqueNegativeIds.add(d.unique_id);
+                negativeLinks.push(link);
             }
+        }
+    });
 
-            document.getElementById('negative_links').innerHTML = `
-                <h3>Negative Articles</h3>
-                <ul>${negativeLinks.join('')}</ul>
-            `;
-        });
+    const dateSpan = dateLabel ? ` <span class="date-range">${date}</span>` : '';
+    if (lists.includes('positive')) {
+        document.getElementById('positive_links').innerHTML = `
+            <h3>Positive Articles${dateSpan}</h3>
+            <ul>${positiveLinks.join('')}</ul>
+        `;
+    }
+    if (lists.includes('negative')) {
+        document.getElementById('negative_links').innerHTML = `
+            <h3>Negative Articles${dateSpan}</h3>
+            <ul>${negativeLinks.join('')}</ul>
+        `;
+    }
+}
 
-        // Aggregate data by date
-        const aggregatedData = d3.rollup(
-            sentimentData,
-            v => ({
-                positive_sentiment: d3.mean(v, d => d.positive_sentiment).toFixed(0),
-                negative_sentiment: d3.mean(v, d => d.negative_sentiment).toFixed(0),
-                neutral_sentiment: d3.mean(v, d => d.neutral_sentiment).toFixed(0),
-            }),
-            d => d.date
-        );
+function updateScoreCards(sentimentData) {
+    const articles = sentimentData.filter(d => d);
 
-        // Convert to array and sort by date
-        const data = Array.from(aggregatedData, ([date, scores]) => ({
-            date: date,
-            positive_sentiment: parseFloat(scores.positive_sentiment), // Convert back to numbers if needed
-            negative_sentiment: parseFloat(scores.negative_sentiment),
-            neutral_sentiment: parseFloat(scores.neutral_sentiment),
-        }))
-        .sort((a, b) => new Date(a.date) - new Date(b.date));
-
-
-        // Set up initial Plotly data with y-values set to 0
-        const initialTracePositive = {
-            x: data.map(d => d.date),
-            y: data.map(d => 0),
-            type: 'bar',
-            name: 'Positive',
-            marker: { color: 'steelblue' }
-        };
+    // Find the highest positive_sentiment and highest negative_sentiment along with their corresponding date
+    const highestPositive = articles.reduce((max, current) => max.positive_sentiment > current.positive_sentiment ? max : current);
+    const highestNegative = articles.reduce((max, current) => max.negative_sentiment > current.negative_sentiment ? max : current);
 
-        const initialTraceNegative = {
-            x: data.map(d => d.date),
-            y: data.map(d => 0),
-            type: 'bar',
-            name: 'Negative',
-            marker: { color: 'red' }
-        };
+    // Update the Negative Score and Postive score with dates
+    document.getElementById('Best_score').textContent = highestPositive.positive_sentiment + "%";
+    document.getElementById('Worst_score').textContent = highestNegative.negative_sentiment + "%";
+    document.getElementById('Best_score_date').textContent = highestPositive.date;
+    document.getElementById('Worst_score_date').textContent = highestNegative.date;
 
-        // Set up final Plotly data with actual y-values
-        const finalTracePositive = {
-            x: data.map(d => d.date),
-            y: data.map(d => d.positive_sentiment),
-            type: 'bar',
-            name: 'Positive',
-            marker: { color: 'steelblue' },
-        };
+    // Show the positive articles of the best date and the negative articles of the worst date on click
+    // (assigned, so repeated updates do not stack handlers)
+    document.getElementById('Best_score_date').onclick = () => showArticleLinks(articles, highestPositive.date, false, false, ['positive']);
+    document.getElementById('Worst_score_date').onclick = () => showArticleLinks(articles, highestNegative.date, false, false, ['negative']);
+}
 
-        const finalTraceNegative = {
-            x: data.map(d => d.date),
-            y: data.map(d => -d.negative_sentiment), // Invert negative score for plotting below x-axis
-            type: 'bar',
-            name: 'Negative',
-            marker: { color: 'red' }
-        };
+// Draw the daily sentiment bars; the first draw animates from zero, later ones update the bars in place
+function renderSentimentChart(sentimentData, animate) {
+    const articles = sentimentData.filter(d => d);
+
+    // Aggregate data by date
+    const aggregatedData = d3.rollup(
+        articles,
+        v => ({
+            positive_sentiment: d3.mean(v, d => d.positive_sentiment).toFixed(0),
+            negative_sentiment: d3.mean(v, d => d.negative_sentiment).toFixed(0),
+            neutral_sentiment: d3.mean(v, d => d.neutral_sentiment).toFixed(0),
+        }),
+        d => d.date
+    );
+
+    // Convert to array and sort by date
+    const data = Array.from(aggregatedData, ([date, scores]) => ({
+        date: date,
+        positive_sentiment: parseFloat(scores.positive_sentiment), // Convert back to numbers if needed
+        negative_sentiment: parseFloat(scores.negative_sentiment),
+        neutral_sentiment: parseFloat(scores.neutral_sentiment),
+    }))
+    .sort((a, b) => new Date(a.date) - new Date(b.date));
+
+    // Set up final Plotly data with actual y-values
+    const finalTracePositive = {
+        x: data.map(d => d.date),
+        y: data.map(d => d.positive_sentiment),
+        type: 'bar',
+        name: 'Positive',
+        marker: { color: 'steelblue' },
+    };
 
-        // Determine the ticks
-        const maxTicks = 6;
-        const tickInterval = Math.ceil(data.length / maxTicks);
-        const tickvals = data.filter((_, i) => i % tickInterval === 0).map(d => d.date);
-        const ticktext = tickvals.map(d => new Date(d).toISOString().slice(0, 7));
-
-        const initialPlotData = [initialTracePositive, initialTraceNegative];
-
-        const layout = {
-            xaxis: {
-                title: '<b>Date</b>',
-                type: 'category',
-                tickvals: tickvals,
-                ticktext: ticktext,
-                tickangle: -45
-            },
-            yaxis: {
-                title: '<b>Sentiment Score %</b>',
-                range: [-1, 1], // Start with a fixed range
-                tickformat: '.1f'
-            },
-            barmode: 'relative',
-            showlegend: true
-        };
+    const finalTraceNegative = {
+        x: data.map(d => d.date),
+        y: data.map(d => -d.negative_sentiment), // Invert negative score for plotting below x-axis
+        type: 'bar',
+        name: 'Negative',
+        marker: { color: 'red' }
+    };
 
-        // Initial plot with y-values set to 0
-        Plotly.newPlot('chart-display', initialPlotData, layout, { displayModeBar: true });
-
-        // Add click event listener to the chart
-        document.getElementById('chart-display').on('plotly_click', (data) => {
-            if (data.points.length > 0) {
-                const point = data.points[0];
-                const date = point.x;
-                const sentimentDataForDate = sentimentData.filter(d => d.date === date);
-                const articleHeadings = sentimentDataForDate.map(d => d.headline);
-                const articleLinks = sentimentDataForDate.map(d => d.link);
-                const positiveScores = sentimentDataForDate.map(d => d.positive_sentiment);
-                const negativeScores = sentimentDataForDate.map(d => d.negative_sentiment);
-                const uniqueIds = sentimentDataForDate.map(d => d.unique_id);
-
-                const positiveLinks = [];
-                const negativeLinks = [];
-                const uniquePositiveIds = new Set(); // Set to track unique positive IDs
-                const uniqueNegativeIds = new Set(); // Set to track unique negative IDs
-
-                for (let i = 0; i < articleHeadings.length; i++) {
-                    if (positiveScores[i] > negativeScores[i]) {
-                        if (!uniquePositiveIds.has(uniqueIds[i])) {
-                            uniquePositiveIds.add(uniqueIds[i]); // Add unique ID to the set
-                            positiveLinks.push(`<li><a href="${articleLinks[i]}" target="_blank">${articleHeadings[i]}</a></li>`);
-                        }
-                    } else if (negativeScores[i] > positiveScores[i]) {
-                        if (!uniqueNegativeIds.has(uniqueIds[i])) {
-                            uniqueNegativeIds.add(uniqueIds[i]); // Add unique ID to the set
-                            negativeLinks.push(`<li><a href="${articleLinks[i]}" target="_blank">${articleHeadings[i]}</a></li>`);
-                        }
-                    }
-                }
+    // Determine the ticks
+    const maxTicks = 6;
+    const tickInterval = Math.ceil(data.length / maxTicks);
+    const tickvals = data.filter((_, i) => i % tickInterval === 0).map(d => d.date);
+    const ticktext = tickvals.map(d => new Date(d).toISOString().slice(0, 7));
+
+    const maxPositive = Math.max(...data.map(d => d.positive_sentiment));
+    const maxNegative = Math.max(...data.map(d => d.negative_sentiment));
+    const maxY = Math.max(maxPositive, maxNegative);
+
+    const layout = {
+        xaxis: {
+            title: '<b>Date</b>',
+            type: 'category',
+            tickvals: tickvals,
+            ticktext: ticktext,
+            tickangle: -45
+        },
+        yaxis: {
+            title: '<b>Sentiment Score %</b>',
+            range: animate ? [-1, 1] : [-maxY - 0.1, maxY + 0.1], // Start with a fixed range when animating
+            tickformat: '.1f'
+        },
+        barmode: 'relative',
+        showlegend: true
+    };
+
+    if (!animate) {
+        // The click handler attached on the first draw keeps working, and reads the latest articles
+        document.getElementById('chart-display').sentimentData = articles;
+        Plotly.react('chart-display', [finalTracePositive, finalTraceNegative], layout, { displayModeBar: true });
+        return;
+    }
+
+    // Set up initial Plotly data with y-values set to 0
+    const initialTracePositive = { ...finalTracePositive, y: data.map(d => 0) };
+    const initialTraceNegative = { ...finalTraceNegative, y: data.map(d => 0) };
+
+    const initialPlotData = [initialTracePositive, initialTraceNegative];
 
-                document.getElementById('positive_links').innerHTML = `
-                    <h3>Positive Articles <span class="date-range">${date}</span></h3>
-                    <ul>${positiveLinks.join('')}</ul>
-                `;
+    // Initial plot with y-values set to 0
+    const chart = document.getElementById('chart-display');
+    chart.sentimentData = articles;
+    Plotly.newPlot('chart-display', initialPlotData, layout, { displayModeBar: true });
 
-                document.getElementById('negative_links').innerHTML = `
-                    <h3>Negative Articles <span class="date-range">${date}</span></h3>
-                    <ul>${negativeLinks.join('')}</ul>
-                `;
+    // Add click event listener to the chart
+    chart.on('plotly_click', (data) => {
+        if (data.points.length > 0) {
+            showArticleLinks(chart.sentimentData, data.points[0].x, true, true);
+        }
+    });
+
+    // Animate the bars to their actual values
+    setTimeout(() => {
+        Plotly.animate('chart-display', {
+            data: [finalTracePositive, finalTraceNegative],
+            traces: [0, 1],
+            layout: layout
+        }, {
+            transition: {
+                duration: 1000,
+                easing: 'cubic-in-out'
+            },
+            frame: {
+                duration: 1000,
+                redraw: false
             }
         });
-          
-        // Animate the bars to their actual values
+
+        // Smooth transition for autoscaling
         setTimeout(() => {
             Plotly.animate('chart-display', {
-                data: [finalTracePositive, finalTraceNegative],
-                traces: [0, 1],
-                layout: layout
+                layout: {
+                    yaxis: {
+                        range: [-maxY - 0.1, maxY + 0.1]
+                    }
+                }
             }, {
                 transition: {
-                    duration: 1000,
+                    duration: 500,
                     easing: 'cubic-in-out'
                 },
                 frame: {
-                    duration: 1000,
+                    duration: 500,
                     redraw: false
                 }
             });
-
-            // Smooth transition for autoscaling
-            setTimeout(() => {
-                const maxPositive = Math.max(...data.map(d => d.positive_sentiment));
-                const maxNegative = Math.max(...data.map(d => d.negative_sentiment));
-                const maxY = Math.max(maxPositive, maxNegative);
-
-                Plotly.animate('chart-display', {
-                    layout: {
-                        yaxis: {
-                            range: [-maxY - 0.1, maxY + 0.1]
-                        }
-                    }
-                }, {
-                    transition: {
-                        duration: 500,
-                        easing: 'cubic-in-out'
-                    },
-                    frame: {
-                        duration: 500,
-                        redraw: false
-                    }
-                });
-            }, 600);
-        }, 500);
-
-        createSentimentGaugeChart("pie-chart", sentimentData)
-    })
-    .finally(() => {
-        // Hide loading animation after chart is rendered
-        clearLoader();
-        document.getElementById('loading').style.display = 'none';
-        document.getElementById('gauge-loading').style.display = 'none';
-    })
-    .catch(error => {
-        console.error('Error:', error);
-        
-        // re-enable  
-        analyzeButton.innerText = 'Analyse Sentiment';
-        analyzeButton.classList.remove('analyzing');
-        analyzeButton.disabled = false;
-
-        document.getElementById('loading').style.display = 'none'; // Ensure to hide animation on error
-        document.getElementById('gauge-loading').style.display = 'none';
-        clearLoader();
-    });
+        }, 600);
+    }, 500);
 }
 
 // Function to handle report generation
@@ -331,25 +431,7 @@ function generateReport(companyName, sentimentData) {
 }
 
 function createSentimentGaugeChart(containerId, sentimentData) {
-    // Calculate mean scores
-    var totalPositive = 0, totalNegative = 0, totalNeutral = 0;
-    var numEntries = sentimentData.length;
-
-    sentimentData.forEach(entry => {
-        totalPositive += entry.positive_sentiment;
-        totalNegative += entry.negative_sentiment;
-        totalNeutral += entry.neutral_sentiment;
-    });
-
-    var meanPositive = totalPositive / numEntries;
-    var meanNegative = totalNegative / numEntries;
-    var meanNeutral = totalNeutral / numEntries;
-
-    var sentiments = {
-        positive: meanPositive,
-        negative: meanNegative,
-        neutral: meanNeutral
-    };
+    var sentiments = meanSentiments(sentimentData);
 
     var currentSentiment = 'positive'; // Default to positive
 
@@ -506,8 +588,33 @@ function createSentimentGaugeChart(containerId, sentimentData) {
     // Initial plot
     createGauge(currentSentiment);
 
-    // Add click event to switch gauges
-    document.getElementById(containerId).addEventListener('click', updateGauge);
+    // Add click event to switch gauges (assigned, so a new analysis does not stack handlers)
+    document.getElementById(containerId).onclick = updateGauge;
+
+    // Move the gauge to the means of updated data, e.g. as more articles are analysed
+    return function(newSentimentData) {
+        sentiments = meanSentiments(newSentimentData);
+        Plotly.restyle(containerId, { value: [sentiments[currentSentiment]] }, [0]);
+    };
+}
+
+function meanSentiments(sentimentData) {
+    // Calculate mean scores
+    var totalPositive = 0, totalNegative = 0, totalNeutral = 0;
+    var entries = sentimentData.filter(entry => entry);
+    var numEntries = entries.length;
+
+    entries.forEach(entry => {
+        totalPositive += entry.positive_sentiment;
+        totalNegative += entry.negative_sentiment;
+        totalNeutral += entry.neutral_sentiment;
+    });
+
+    return {
+        positive: totalPositive / numEntries,
+        negative: totalNegative / numEntries,
+        neutral: totalNeutral / numEntries
+    };
 }
 
 function resetContent() {
@@ -0,0 +1,157 @@
+import asyncio
+import bisect
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, float("inf"))
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        Fixed-bucket latency histogram.
+
+        :param buckets: Sorted upper bounds of the buckets in seconds, the last one should be inf
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        """
+        :return: Dictionary with per-bucket counts (keyed by upper bound), count, sum and mean.
+        """
+        return {
+            "buckets": {("+Inf" if bound == float("inf") else bound): n for bound, n in zip(self.buckets, self.counts)},
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "mean": round(self.sum / self.count, 3) if self.count else None,
+        }
+
+
+class AIMDConcurrencyController:
+    def __init__(self, initial_limit=8, min_limit=1, max_limit=40, additive_increase=1.0,
+                 multiplicative_decrease=0.5, latency_target=3.0, max_error_rate=0.2, window=20):
+        """
+        Additive-increase / multiplicative-decrease concurrency limit.
+
+        The limit grows by `additive_increase` per window of `limit` healthy completions (fast, successful),
+        and is multiplied by `multiplicative_decrease` on a timeout, a throttling response, or when the
+        error rate over the last `window` completions exceeds `max_error_rate`. After a decrease, further
+        decreases are ignored until `limit` more completions have been seen, so one burst of failures
+        only backs off once. A 'no_redirect' completion (the task ran fine but found nothing) neither
+        grows nor shrinks the limit.
+
+        Not thread-safe: use it from a single event loop.
+
+        :param initial_limit: Starting concurrency limit
+        :param min_limit: Lowest allowed limit
+        :param max_limit: Highest allowed limit
+        :param additive_increase: Limit increase per window of healthy completions
+        :param multiplicative_decrease: Factor applied to the limit on back-off
+        :param latency_target: Completions slower than this (seconds) do not grow the limit
+        :param max_error_rate: Error rate over the recent window that triggers a back-off
+        :param window: Number of recent completions used for the error rate
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.latency_target = latency_target
+        self.max_error_rate = max_error_rate
+
+        self.in_flight = 0
+        self.latency_histogram = LatencyHistogram()
+        self.outcomes = {"ok": 0, "no_redirect": 0, "timeout": 0, "throttled": 0, "error": 0}
+        self.increases = 0
+        self.decreases = 0
+
+        self._recent_errors = deque(maxlen=window)
+        self._cooldown = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        """
+        Wait until a slot is free under the current limit and take it.
+        """
+        loop = asyncio.get_running_loop()
+        while self.in_flight >= int(self.limit):
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self):
+        """
+        Free a slot taken by acquire().
+        """
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def _decrease(self, reason):
+        if self._cooldown > 0:
+            return
+        old_limit = self.limit
+        self.limit = max(self.min_limit, self.limit * self.multiplicative_decrease)
+        self._cooldown = int(old_limit)
+        self.decreases += 1
+        logger.info(f"Concurrency limit decreased from {old_limit:.1f} to {self.limit:.1f} ({reason})")
+
+    def record(self, latency, outcome):
+        """
+        Record a completed task and adjust the limit.
+
+        :param latency: Duration of the task in seconds
+        :param outcome: One of 'ok', 'no_redirect', 'timeout', 'throttled' or 'error'
+        """
+        self.latency_histogram.observe(latency)
+        self.outcomes[outcome] += 1
+        self._recent_errors.append(outcome in ("timeout", "throttled", "error"))
+        if self._cooldown > 0:
+            self._cooldown -= 1
+
+        error_rate = sum(self._recent_errors) / len(self._recent_errors)
+        if outcome in ("timeout", "throttled"):
+            self._decrease(outcome)
+        elif error_rate > self.max_error_rate and len(self._recent_errors) == self._recent_errors.maxlen:
+            self._decrease(f"error rate {error_rate:.0%}")
+        elif outcome == "ok" and latency <= self.latency_target and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + self.additive_increase / self.limit)
+            self.increases += 1
+            self._wake_waiters()
+
+    def stats(self):
+        """
+        :return: Dictionary with the current limit, in-flight count, outcome counts and latency histogram.
+        """
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "outcomes": dict(self.outcomes),
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "latency_seconds": self.latency_histogram.snapshot(),
+        }
@@ -1,143 +1,237 @@
 import pandas as pd
 import asyncio
-import aiohttp
-from trafilatura import extract
-from newspaper import Article
 import logging
 import time
-from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from utils.sqlite_cache import SQLiteCache
+from utils.extraction_pool import extract_with_chain_pooled
+from utils.http_fetcher import create_session, fetch_with_retries, DEFAULT_FETCH_SETTINGS
+from utils.metrics import get_metrics
 
 # Set up logging configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Thread pool executor for Newspaper3k to allow non-blocking execution
-executor = ThreadPoolExecutor()
+ARTICLE_FETCH_SECONDS = get_metrics().histogram("article_fetch_seconds", "Duration of downloading one article page, per host.",
+                                                ["host"])
+ARTICLE_FETCH_FAILURES = get_metrics().counter("article_fetch_failures_total", "Article downloads without a usable response, per host.",
+                                               ["host"])
+ARTICLE_EXTRACT_SECONDS = get_metrics().histogram("article_extract_seconds", "Duration of extracting the text of one downloaded page, "
+                                                  "by the extractor that succeeded ('none' if all failed).", ["extractor"])
+ARTICLE_CONTENT_CACHE = get_metrics().counter("article_content_cache_total", "Article content cache lookups.", ["result"])
 
-async def fetch_url_async(session, url):
-    """
-    Asynchronously fetch the HTML content of a URL.
+# Query parameters that do not change the article and are dropped from cache keys
+TRACKING_PARAMS = {"fbclid", "gclid", "ocid", "cmpid", "ref", "src", "mc_cid", "mc_eid"}
 
-    Args:
-        session (aiohttp.ClientSession): The session to make the request.
-        url (str): The URL to fetch.
 
-    Returns:
-        str: The HTML content or None if the fetch fails.
-    """
-    try:
-        async with session.get(url) as response:
-            response.raise_for_status()
-            return await response.text()
-    except Exception as e:
-        logger.debug(f"Failed to fetch URL {url}: Error: {str(e)}")
-        return None
-
-async def extract_with_trafilatura(url, session):
+def normalize_url(url):
     """
-    Extract content from a URL using Trafilatura.
+    Normalize a URL for use as a cache key.
+
+    Lowercases the scheme and host, drops the fragment, default ports, tracking parameters and a trailing
+    slash, and sorts the remaining query parameters.
 
     Args:
-        url (str): The URL to extract content from.
-        session (aiohttp.ClientSession): The session to make the request.
+        url (str): The URL to normalize.
 
     Returns:
-        str: Extracted content or None if extraction fails.
+        str: The normalized URL.
     """
-    try:
-        page_content = await fetch_url_async(session, url)
-        if not page_content:
-            raise ValueError("Failed to retrieve page content.")
-        tflr_content = extract(page_content)
-        if not tflr_content:
-            raise ValueError("Trafilatura extraction failed.")
-        logger.info(f"Extracted with Trafilatura from {url}")
-        return tflr_content
-    except Exception as e:
-        logger.debug(f"Trafilatura failed for {url}: {str(e)}")
-        return None
-
-def extract_with_newspaper(url):
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        netloc = f"{netloc}:{parts.port}"
+
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not (key.lower().startswith("utm_") or key.lower() in TRACKING_PARAMS))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+class ArticleContentCache:
+    def __init__(self, fresh_ttl=7 * 24 * 3600, max_age=90 * 24 * 3600):
+        """
+        Persistent cache of extracted article content, keyed by the normalized URL.
+
+        Each entry stores the extracted text, the extractor used, the HTTP ETag / Last-Modified validators
+        and the fetch time. Entries younger than `fresh_ttl` are served without any network access; older
+        ones are revalidated with a conditional GET.
+
+        Args:
+            fresh_ttl (int): Seconds during which an entry is served without revalidation.
+            max_age (int): Seconds after which an entry is dropped entirely.
+        """
+        self.fresh_ttl = fresh_ttl
+        self.max_age = max_age
+        self._store = SQLiteCache("article_content.sqlite3", "article_content")
+
+    def lookup(self, url):
+        """
+        Returns:
+            dict: The cached entry (fresh or stale) or None on a miss.
+        """
+        return self._store.get(normalize_url(url))
+
+    def is_fresh(self, entry):
+        return time.time() - entry["fetched_at"] < self.fresh_ttl
+
+    def conditional_headers(self, entry):
+        """
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers to revalidate a stale entry.
+        """
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, content, extractor, etag=None, last_modified=None):
+        entry = {
+            "content": content,
+            "extractor": extractor,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        self._store.set(normalize_url(url), entry, self.max_age)
+
+    def revalidated(self, url, entry):
+        """
+        Mark a stale entry as fresh again after a 304 Not Modified response.
+        """
+        self.store(url, entry["content"], entry["extractor"], entry.get("etag"), entry.get("last_modified"))
+
+
+_article_cache = None
+
+
+def get_article_cache():
     """
-    Extract content from a URL using Newspaper3k.
-
-    Args:
-        url (str): The URL to extract content from.
-
     Returns:
-        str: Extracted content or None if extraction fails.
+        ArticleContentCache: The process-wide article content cache, created on first use.
     """
-    try:
-        article = Article(url)
-        article.download()
-        article.parse()
-        if article.text:
-            logger.info(f"Extracted with Newspaper3k from {url}")
-            return article.text
-        else:
-            return None
-    except Exception as e:
-        logger.debug(f"Newspaper3k failed for {url}: {str(e)}")
-        return None
-
-async def extract_with_newspaper_async(url):
+    global _article_cache
+    if _article_cache is None:
+        _article_cache = ArticleContentCache()
+    return _article_cache
+
+
+async def fetch_page_async(session, url, headers=None, settings=None):
     """
-    Non-blocking wrapper for Newspaper3k extraction.
+    Asynchronously fetch a URL, optionally with conditional request headers.
+
+    Retries, timeouts and the response-size cap are handled by utils.http_fetcher.
 
     Args:
-        url (str): The URL to extract content from.
+        session (aiohttp.ClientSession): The session to make the request.
+        url (str): The URL to fetch.
+        headers (dict): Extra request headers, e.g. If-None-Match.
+        settings (FetchSettings): Fetch settings, defaults to DEFAULT_FETCH_SETTINGS.
 
     Returns:
-        str: Extracted content or None if extraction fails.
+        tuple: (status, raw HTML bytes or None, response headers). Status is None if no response was received.
     """
-    return await asyncio.get_event_loop().run_in_executor(executor, extract_with_newspaper, url)
-
-async def extract_content_with_fallback(url, session):
+    host = urlsplit(url).hostname or ""
+    with ARTICLE_FETCH_SECONDS.time(host=host):
+        status, page_content, response_headers = await fetch_with_retries(session, url, settings, headers)
+    if page_content is None and status != 304:
+        ARTICLE_FETCH_FAILURES.inc(host=host)
+    return status, page_content, response_headers
+
+async def extract_content_with_fallback(url, session, cache=None, settings=None):
     """
     Attempt to extract content using Trafilatura and fall back to Newspaper3k if it fails.
 
+    The page is downloaded once and the same HTML is handed to every extractor of the chain in the
+    process pool, so a fallback never costs a second network round-trip.
+
+    Fresh cache entries are returned without any network access. Stale entries are revalidated with a
+    conditional GET and reused on 304 Not Modified. Cache reads and writes run in a thread, off the event loop.
+
     Args:
         url (str): The URL to extract content from.
         session (aiohttp.ClientSession): The session to make requests.
+        cache (ArticleContentCache): Cache to use, defaults to the process-wide cache.
+        settings (FetchSettings): Fetch settings, defaults to DEFAULT_FETCH_SETTINGS.
 
     Returns:
         str: Extracted content or None if both methods fail.
     """
-    content = await extract_with_trafilatura(url, session)
+    cache = cache or get_article_cache()
+    entry = await asyncio.to_thread(cache.lookup, url)
+    if entry and cache.is_fresh(entry):
+        logger.debug(f"Article cache hit for {url}")
+        ARTICLE_CONTENT_CACHE.inc(result="hit")
+        return entry["content"]
+    ARTICLE_CONTENT_CACHE.inc(result="stale" if entry else "miss")
+
+    status, page_content, headers = await fetch_page_async(session, url, cache.conditional_headers(entry), settings)
+    if status == 304 and entry:
+        logger.debug(f"Article not modified, revalidated cache entry for {url}")
+        await asyncio.to_thread(cache.revalidated, url, entry)
+        return entry["content"]
+
+    start_time = time.perf_counter()
+    content, extractor = await extract_with_chain_pooled(url, page_content)
+    if page_content:
+        ARTICLE_EXTRACT_SECONDS.observe(time.perf_counter() - start_time, extractor=extractor or "none")
     if content:
-        return content
+        logger.info(f"Extracted with {extractor} from {url}")
     else:
-        logger.debug(f"Falling back to Newspaper3k for {url}")
-        content = await extract_with_newspaper_async(url)
-        return content
+        logger.debug(f"All extractors failed for {url} (status {status})")
+
+    if content:
+        await asyncio.to_thread(cache.store, url, content, extractor, headers.get("ETag"), headers.get("Last-Modified"))
+    elif entry:
+        # Serve the stale copy rather than nothing if the page can no longer be extracted
+        return entry["content"]
+    return content
 
-async def extract_content_for_multiple_urls(urls):
+async def extract_content_for_multiple_urls(urls, settings=None):
     """
     Extract content for multiple URLs concurrently.
 
+    Connections are bounded overall and per host by the session's connector, and the whole batch is
+    bounded by `settings.batch_timeout`: URLs still pending at the deadline are reported as None.
+
     Args:
         urls (list of str): List of URLs to extract content from.
+        settings (FetchSettings): Fetch settings, defaults to DEFAULT_FETCH_SETTINGS.
 
     Returns:
         dict: A dictionary where keys are URLs and values are the extracted content.
     """
-    async with aiohttp.ClientSession() as session:
-        # Create tasks and ensure coroutines are properly awaited
-        tasks = [extract_content_with_fallback(url, session) for url in urls]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        return {url: result if not isinstance(result, Exception) else None for url, result in zip(urls, results)}
-
-def extract_content_sync(urls):
+    settings = settings or DEFAULT_FETCH_SETTINGS
+    async with create_session(settings) as session:
+        tasks = {url: asyncio.create_task(extract_content_with_fallback(url, session, settings=settings))
+                 for url in dict.fromkeys(urls)}
+        if not tasks:
+            return {}
+        _, pending = await asyncio.wait(tasks.values(), timeout=settings.batch_timeout)
+        if pending:
+            logger.warning(f"Batch deadline reached, cancelling {len(pending)} pending extractions")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return {url: task.result() if not task.cancelled() and task.exception() is None else None
+                for url, task in tasks.items()}
+
+def extract_content_sync(urls, settings=None):
     """
     Synchronous wrapper for extracting content from multiple URLs.
 
     Args:
         urls (list of str): List of URLs to extract content from.
+        settings (FetchSettings): Fetch settings, defaults to DEFAULT_FETCH_SETTINGS.
 
     Returns:
         dict: A dictionary where keys are URLs and values are the extracted content (or None for failed extractions).
     """
-    results = asyncio.run(extract_content_for_multiple_urls(urls))
+    results = asyncio.run(extract_content_for_multiple_urls(urls, settings))
 
     # Log and print summary
     total_urls = len(urls)
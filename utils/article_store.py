@@ -0,0 +1,156 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+
+from utils.sqlite_cache import CACHE_DIR
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def company_key(company_name):
+    return " ".join(company_name.lower().split())
+
+
+def _merge_ranges(ranges):
+    """
+    :param ranges: Iterable of (start, end) date pairs, end exclusive
+    :return: Sorted list of non-overlapping ranges covering the same days.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class ArticleStore:
+    def __init__(self, db_name="articles.sqlite3"):
+        """
+        Persistent per-company store of Google News article rows and of the date ranges already searched,
+        so that a scrape only has to search the days it has not seen yet.
+
+        Ranges are (start, end) dates with the end excluded, as in the 'after:start before:end' search.
+        A connection is opened per operation, so one instance can be shared across threads and event loops.
+
+        :param db_name: File name of the database inside CACHE_DIR
+        """
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.db_path = os.path.join(CACHE_DIR, db_name)
+        self._write_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles (company TEXT, title TEXT, link TEXT, published_date TEXT, "
+                "stored_at REAL, PRIMARY KEY (company, title, link, published_date))"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS coverage (company TEXT, start TEXT, end TEXT, fetched_at REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS coverage_company ON coverage (company)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def covered_ranges(self, company_name):
+        """
+        :return: Sorted, merged list of the (start, end) date ranges searched for the company.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT start, end FROM coverage WHERE company = ?", (company_key(company_name),)).fetchall()
+        return _merge_ranges((date.fromisoformat(start), date.fromisoformat(end)) for start, end in rows)
+
+    def missing_ranges(self, company_name, start, end):
+        """
+        :param start: First day of the wanted range
+        :param end: Day after the wanted range
+        :return: List of the (start, end) sub-ranges not searched yet, in date order.
+        """
+        missing = []
+        for covered_start, covered_end in self.covered_ranges(company_name):
+            if covered_end <= start or covered_start >= end:
+                continue
+            if covered_start > start:
+                missing.append((start, covered_start))
+            start = max(start, covered_end)
+        if start < end:
+            missing.append((start, end))
+        return missing
+
+    def add_coverage(self, company_name, start, end):
+        """
+        Record that every article of the company published in [start, end) has been stored.
+        """
+        key = company_key(company_name)
+        with self._write_lock, self._connect() as conn:
+            rows = conn.execute("SELECT start, end FROM coverage WHERE company = ?", (key,)).fetchall()
+            ranges = [(date.fromisoformat(s), date.fromisoformat(e)) for s, e in rows] + [(start, end)]
+            # Keep the table small by storing the merged ranges only
+            conn.execute("DELETE FROM coverage WHERE company = ?", (key,))
+            conn.executemany(
+                "INSERT INTO coverage (company, start, end, fetched_at) VALUES (?, ?, ?, ?)",
+                [(key, s.isoformat(), e.isoformat(), time.time()) for s, e in _merge_ranges(ranges)],
+            )
+
+    def add_articles(self, company_name, articles):
+        """
+        Store article rows ('Title', 'Link', 'Published_Date'); rows already stored are ignored.
+        """
+        if not articles:
+            return
+        key = company_key(company_name)
+        now = time.time()
+        rows = [(key, a["Title"], a["Link"], a["Published_Date"], now) for a in articles]
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO articles (company, title, link, published_date, stored_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def get_articles(self, company_name, start, end):
+        """
+        :return: Stored article rows of the company published in [start, end), in date order.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT title, link, published_date FROM articles WHERE company = ? AND published_date >= ? "
+                "AND published_date < ? ORDER BY published_date",
+                (company_key(company_name), start.isoformat(), end.isoformat()),
+            ).fetchall()
+        return [{"Title": title, "Link": link, "Published_Date": published_date} for title, link, published_date in rows]
+
+    def clear(self, company_name):
+        """
+        Forget the stored articles and searched ranges of a company, so the next scrape searches everything again.
+        """
+        key = company_key(company_name)
+        with self._write_lock, self._connect() as conn:
+            conn.execute("DELETE FROM articles WHERE company = ?", (key,))
+            conn.execute("DELETE FROM coverage WHERE company = ?", (key,))
+
+
+_article_store = None
+_article_store_lock = threading.Lock()
+
+
+def get_article_store():
+    """
+    :return: The process-wide article store, created on first use.
+    """
+    global _article_store
+    with _article_store_lock:
+        if _article_store is None:
+            _article_store = ArticleStore()
+        return _article_store
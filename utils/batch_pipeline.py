@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+
+from utils.articleContentExtractor import extract_content_with_fallback
+from utils.http_fetcher import create_session
+from utils.playwright_rssLinksResolver_optimized import GoogleNewsLinkResolverOptimized
+from utils.metrics import request_timings
+from utils.relevance_filter import RelevanceFilter
+from utils.streaming_pipeline import ScrapeScorePipeline
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class FairLimiter:
+    def __init__(self, limit):
+        """
+        Concurrency limit shared by several clients, handing freed slots to waiting clients in turn,
+        so a client with a long backlog cannot starve the others.
+
+        :param limit: Slots in use at the same time
+        """
+        self.limit = limit
+        self.active = 0
+        self._waiters = OrderedDict()  # Client key -> deque of futures, in round-robin order
+
+    async def acquire(self, key):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # The slot was handed over just before the cancellation
+            elif future in self._waiters.get(key, ()):
+                self._waiters[key].remove(future)
+                if not self._waiters[key]:
+                    del self._waiters[key]
+            raise
+
+    def release(self):
+        while self._waiters:
+            # The slot stays in use and passes to the first waiter of the next client in turn
+            key, waiters = self._waiters.popitem(last=False)
+            future = waiters.popleft()
+            if waiters:
+                self._waiters[key] = waiters
+            if future.done():
+                continue  # Cancelled, its task has not removed it yet
+            future.set_result(None)
+            return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, key):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class SharedFetches:
+    def __init__(self, resolve_workers=20, extract_workers=50, analyse_workers=10):
+        """
+        Link resolver, HTTP session and stage limits shared by the pipelines of a batch of companies.
+
+        Each link is resolved, and each article downloaded and extracted, once for the whole batch: an article
+        found in the news of several companies is fetched by the first pipeline asking for it, and the others
+        wait for and reuse its result. Slots of each stage are shared fairly between the companies (see FairLimiter).
+
+        Use as `async with SharedFetches() as shared:` and pass it to each ScrapeScorePipeline as `shared`.
+
+        :param resolve_workers: Links resolved at the same time across the batch
+        :param extract_workers: Articles downloaded and extracted at the same time across the batch
+        :param analyse_workers: Gemini analyses in flight at the same time across the batch
+        """
+        self.resolve_workers = resolve_workers
+        self.limiters = {"resolve": FairLimiter(resolve_workers), "extract": FairLimiter(extract_workers),
+                         "analyse": FairLimiter(analyse_workers)}
+        self.counts = defaultdict(int)
+        self._resolved = {}
+        self._contents = {}
+        self._resolver = None
+        self._session = None
+
+    async def __aenter__(self):
+        self._resolver = GoogleNewsLinkResolverOptimized(max_pages=self.resolve_workers)
+        self._session = create_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._resolver.close()
+        await self._session.close()
+        logger.info(f"Shared fetches: {dict(self.counts)}")
+
+    def slot(self, stage, company_name):
+        """
+        :return: Async context manager holding one of the stage's slots for the company.
+        """
+        return self.limiters[stage].slot(company_name)
+
+    async def _once(self, results, key, stage, company_name, fetch):
+        if key in results:
+            self.counts[f"{stage}_reused"] += 1
+            return await asyncio.shield(results[key])
+
+        future = results[key] = asyncio.get_running_loop().create_future()
+        result = None
+        try:
+            async with self.slot(stage, company_name):
+                result = await fetch()
+        finally:
+            self.counts[stage] += 1
+            future.set_result(result)
+        return result
+
+    async def resolve_link(self, company_name, link):
+        """
+        :return: Resolved link of a Google News link, or None if it could not be resolved.
+        """
+        return await self._once(self._resolved, link, "resolve", company_name,
+                                lambda: self._resolver.resolve_link(link))
+
+    async def fetch_content(self, company_name, url):
+        """
+        :return: Extracted content of an article, or None if it could not be extracted.
+        """
+        return await self._once(self._contents, url, "extract", company_name,
+                                lambda: extract_content_with_fallback(url, self._session))
+
+    def stats(self):
+        """
+        :return: Dictionary with the number of links resolved and articles extracted, and of reused results.
+        """
+        return dict(self.counts)
+
+
+def unique_companies(company_names):
+    """
+    :return: Company names without blanks and repeats (ignoring case and spacing), in their first order.
+    """
+    companies = {}
+    for company_name in company_names:
+        company_name = " ".join(company_name.split())
+        if company_name:
+            companies.setdefault(company_name.lower(), company_name)
+    return list(companies.values())
+
+
+class BatchScrapeScore:
+    def __init__(self, company_names, period, resolve_workers=20, extract_workers=50, analyse_workers=10,
+                 use_relevance_filter=True, on_event=None, **pipeline_kwargs):
+        """
+        Scrape and score several companies at once: one ScrapeScorePipeline per company, running concurrently
+        on one event loop with shared fetches and fairly shared stage limits (see SharedFetches).
+
+        :param company_names: Names of the companies; repeats are scored once
+        :param period: Period string, e.g. '7d' or '365d'
+        :param resolve_workers: Links resolved at the same time across the batch
+        :param extract_workers: Articles downloaded and extracted at the same time across the batch
+        :param analyse_workers: Gemini analyses in flight at the same time across the batch
+        :param use_relevance_filter: Give each company's pipeline a RelevanceFilter for that company
+        :param on_event: Optional callback receiving the pipelines' events, with the 'company' they belong to
+        :param pipeline_kwargs: Further ScrapeScorePipeline arguments, e.g. stateless or batch_size
+        """
+        self.company_names = unique_companies(company_names)
+        self.period = period
+        self.resolve_workers = resolve_workers
+        self.extract_workers = extract_workers
+        self.analyse_workers = analyse_workers
+        self.use_relevance_filter = use_relevance_filter
+        self.on_event = on_event
+        self.pipeline_kwargs = pipeline_kwargs
+        self.pipelines = {}
+        self.shared_stats = {}
+        self.timings = None
+
+    def _company_events(self, company_name):
+        if self.on_event is None:
+            return None
+        return lambda event: self.on_event({**event, "company": company_name})
+
+    async def run(self):
+        """
+        Run the pipelines of all companies. Timers of the whole batch are summarised in self.timings,
+        and those of each company in its pipeline's timings.
+
+        :return: Dictionary of company name: DataFrame of analysed articles, or the exception its pipeline raised.
+        """
+        start_time = time.time()
+        with request_timings() as self.timings:
+            results = await self._run_pipelines()
+        logger.info(f"Batch of {len(results)} companies completed in {time.time() - start_time:.2f} seconds. "
+                    f"Shared fetches: {self.shared_stats}")
+        return results
+
+    async def _run_pipelines(self):
+        async with SharedFetches(self.resolve_workers, self.extract_workers, self.analyse_workers) as shared:
+            for company_name in self.company_names:
+                relevance_filter = RelevanceFilter(company_name) if self.use_relevance_filter else None
+                self.pipelines[company_name] = ScrapeScorePipeline(
+                    company_name, self.period, resolve_workers=self.resolve_workers,
+                    extract_workers=self.extract_workers, analyse_workers=self.analyse_workers,
+                    relevance_filter=relevance_filter, on_event=self._company_events(company_name), shared=shared,
+                    **self.pipeline_kwargs)
+
+            outcomes = await asyncio.gather(*(pipeline.run() for pipeline in self.pipelines.values()),
+                                            return_exceptions=True)
+            self.shared_stats = shared.stats()
+
+        results = dict(zip(self.pipelines, outcomes))
+        for company_name, outcome in results.items():
+            if isinstance(outcome, BaseException):
+                logger.error(f"Pipeline of '{company_name}' failed: {outcome!r}")
+        return results
+
+    def run_sync(self):
+        """
+        Synchronous wrapper for running the batch.
+
+        :return: Dictionary of company name: DataFrame of analysed articles or exception.
+        """
+        return asyncio.run(self.run())
+
+
+def main():
+    import argparse
+    import os
+    import re
+
+    parser = argparse.ArgumentParser(description="Scrape and score the news of several companies in one batch.")
+    parser.add_argument("companies", nargs="*", help="Company names")
+    parser.add_argument("--file", help="Text file with one company name per line")
+    parser.add_argument("--period", default="30d", help="Period, e.g. '7d' or '365d'")
+    parser.add_argument("--output-dir", default="batch_results", help="Directory of the per-company JSON results")
+    parser.add_argument("--stateless", action="store_true", help="Analyse articles without the per-date chat history")
+    parser.add_argument("--batch-size", type=int, default=1, help="Articles per Gemini request; above 1 enables batching")
+    args = parser.parse_args()
+
+    company_names = list(args.companies)
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            company_names.extend(line.strip() for line in f)
+    if not unique_companies(company_names):
+        parser.error("No company names given.")
+
+    batch = BatchScrapeScore(company_names, args.period, stateless=args.stateless, batch_size=args.batch_size)
+    results = batch.run_sync()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for company_name, outcome in results.items():
+        if isinstance(outcome, BaseException):
+            print(f"{company_name}: failed ({outcome!r})")
+            continue
+        output_path = os.path.join(args.output_dir, re.sub(r"[^\w.-]+", "_", company_name) + ".json")
+        outcome.to_json(output_path, orient="records")
+        print(f"{company_name}: {len(outcome)} articles -> {output_path}")
+    print(f"Shared fetches: {batch.shared_stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import logging
+import re
+
+from utils.gemini_model import estimate_tokens
+from utils.relevance_filter import company_aliases
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Default maximum estimated tokens of article content sent to Gemini
+CONTENT_TOKEN_BUDGET = 3000
+
+_PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n|\n")
+
+
+class ContentBudget:
+    def __init__(self, company_name, max_tokens=CONTENT_TOKEN_BUDGET, lead_paragraphs=2, extra_aliases=()):
+        """
+        Trim long article text to a token budget before it is sent to Gemini.
+
+        Articles within the budget are left untouched. Longer ones (live blogs, pages with a lot of
+        boilerplate) keep their lead paragraphs and then the paragraphs mentioning the company or an alias,
+        in their original order, until the budget is used up. Tokens are estimated locally, so budgeting
+        costs no API calls.
+
+        :param company_name: Name of the company
+        :param max_tokens: Maximum estimated tokens of content per article
+        :param lead_paragraphs: Number of opening paragraphs always kept
+        :param extra_aliases: Additional names or tickers that mark a paragraph as relevant
+        """
+        self.max_tokens = max_tokens
+        self.lead_paragraphs = lead_paragraphs
+        aliases = "|".join(re.escape(alias) for alias in company_aliases(company_name, extra_aliases))
+        self._alias_re = re.compile(rf"(?<![a-z0-9])(?:{aliases})(?![a-z0-9])", re.IGNORECASE)
+
+        self.truncated = 0
+        self.tokens_saved = 0
+
+    def _select(self, paragraphs):
+        """
+        :return: Indices of the paragraphs to keep, by priority: lead first, then company mentions.
+        """
+        lead = list(range(min(self.lead_paragraphs, len(paragraphs))))
+        mentions = [i for i in range(len(lead), len(paragraphs)) if self._alias_re.search(paragraphs[i])]
+        return lead + mentions
+
+    def apply(self, article_headline, article_content):
+        """
+        :param article_headline: Headline of the article (for logging)
+        :param article_content: Extracted article text
+        :return: The content, trimmed to the budget if needed.
+        """
+        original_tokens = estimate_tokens(article_content or "")
+        if not article_content or original_tokens <= self.max_tokens:
+            return article_content
+
+        paragraphs = [paragraph.strip() for paragraph in _PARAGRAPH_SPLIT_RE.split(article_content) if paragraph.strip()]
+        kept, remaining = {}, self.max_tokens
+        for i in self._select(paragraphs):
+            tokens = estimate_tokens(paragraphs[i])
+            if tokens > remaining:
+                if remaining > 50:
+                    kept[i] = paragraphs[i][:remaining * 4]  # estimate_tokens counts about 4 characters per token
+                break
+            kept[i] = paragraphs[i]
+            remaining -= tokens
+
+        content = "\n".join(kept[i] for i in sorted(kept))
+        saved = original_tokens - estimate_tokens(content)
+        self.truncated += 1
+        self.tokens_saved += saved
+        logger.info(f"Trimmed article '{article_headline}' from {original_tokens} to {original_tokens - saved} "
+                    f"estimated tokens ({saved} saved).")
+        return content
+
+    def stats(self):
+        """
+        :return: Dictionary with the number of trimmed articles and the estimated tokens saved.
+        """
+        return {"truncated": self.truncated, "tokens_saved": self.tokens_saved}
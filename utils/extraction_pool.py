@@ -0,0 +1,138 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from trafilatura import extract
+
+# Keep this module light: worker processes import it to unpickle the extraction functions.
+logger = logging.getLogger(__name__)
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """
+    Returns:
+        ProcessPoolExecutor: The process-wide parsing pool, sized to the available cores and created on first use.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            max_workers = os.cpu_count() or 1
+            logger.info(f"Starting extraction process pool with {max_workers} workers")
+            _process_pool = ProcessPoolExecutor(max_workers=max_workers)
+            atexit.register(_process_pool.shutdown, wait=False, cancel_futures=True)
+        return _process_pool
+
+
+def trafilatura_extract(page_content):
+    """
+    Run Trafilatura on raw HTML. Executed inside the worker processes.
+
+    Args:
+        page_content (bytes): HTML of the page; Trafilatura detects the encoding itself.
+
+    Returns:
+        str: Extracted content or None if extraction fails.
+    """
+    return extract(page_content) or None
+
+
+def newspaper_extract(url, page_content):
+    """
+    Run Newspaper3k on already fetched HTML, without downloading the page again. Executed inside the worker processes.
+
+    Args:
+        url (str): URL the HTML was fetched from (used by Newspaper3k for relative links and metadata).
+        page_content (bytes): HTML of the page.
+
+    Returns:
+        str: Extracted content or None if extraction fails.
+    """
+    from newspaper import Article  # Imported lazily: only needed when the fallback runs
+
+    article = Article(url)
+    article.set_html(page_content)
+    article.parse()
+    return article.text or None
+
+
+# Extractors tried in order on the same downloaded HTML
+EXTRACTION_CHAIN = (
+    ("trafilatura", lambda url, page_content: trafilatura_extract(page_content)),
+    ("newspaper3k", newspaper_extract),
+)
+
+
+def extract_with_chain(url, page_content):
+    """
+    Run every extractor of EXTRACTION_CHAIN on the same HTML until one succeeds. Executed inside the worker processes.
+
+    Args:
+        url (str): URL the HTML was fetched from.
+        page_content (bytes): HTML of the page.
+
+    Returns:
+        tuple: (extracted content, extractor name) or (None, None) if every extractor fails.
+    """
+    for name, extractor in EXTRACTION_CHAIN:
+        try:
+            content = extractor(url, page_content)
+        except Exception as e:
+            logger.debug(f"{name} failed for {url}: {e}")
+            continue
+        if content:
+            return content, name
+    return None, None
+
+
+async def run_in_process_pool(func, *args):
+    """
+    Run a CPU-bound function in the parsing pool without blocking the event loop.
+
+    Args:
+        func (callable): Picklable, module-level function.
+        *args: Picklable arguments (pass HTML as bytes).
+
+    Returns:
+        The function's return value.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), func, *args)
+
+
+async def extract_with_trafilatura_pooled(page_content):
+    """
+    Parse HTML with Trafilatura in the process pool, so lxml parsing overlaps with downloads.
+
+    Args:
+        page_content (bytes): HTML of the page.
+
+    Returns:
+        str: Extracted content or None if extraction fails.
+    """
+    if not page_content:
+        return None
+    return await run_in_process_pool(trafilatura_extract, page_content)
+
+
+async def extract_with_chain_pooled(url, page_content):
+    """
+    Run the whole extractor fallback chain on one downloaded page in the process pool.
+
+    The HTML is shipped to a worker once and reused by every extractor, so a fallback costs CPU only,
+    never a second network round-trip.
+
+    Args:
+        url (str): URL the HTML was fetched from.
+        page_content (bytes): HTML of the page.
+
+    Returns:
+        tuple: (extracted content, extractor name) or (None, None) if every extractor fails.
+    """
+    if not page_content:
+        return None, None
+    return await run_in_process_pool(extract_with_chain, url, page_content)
@@ -1,17 +1,28 @@
 import os
 import json
-import ast
+import hashlib
 import pandas as pd
 import asyncio
 import time
 from dotenv import load_dotenv
-from utils.gemini_model import model_config, initiate_model, start_history, model_output
+from utils.gemini_model import (model_config, batch_model_config, initiate_model, start_history, model_output,
+                                batch_model_output, format_article, estimate_tokens, prompt_fingerprint,
+                                article_schema)
+from utils.sqlite_cache import SQLiteCache
+from utils.story_dedup import assign_unique_ids, split_near_duplicates, NearDuplicateIndex
+from utils.gemini_scheduler import get_gemini_scheduler, date_priority
+from utils.content_budget import ContentBudget, CONTENT_TOKEN_BUDGET
+from utils.result_formatting import format_q_columns
+from utils.metrics import get_metrics
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+GEMINI_TOKENS = get_metrics().counter("gemini_tokens_total", "Gemini tokens used.", ["direction"])
+ANALYSIS_CACHE = get_metrics().counter("analysis_cache_total", "Analysis cache lookups.", ["result"])
+
 # Load environment variables
 load_dotenv()
 genai_api_key = os.getenv("GEMINI_API_KEY")
@@ -21,30 +32,204 @@ assert genai_api_key, "GEMINI_API_KEY is not set in the environment variables."
 INPUT_PRICING = 0.075 * 10**-6 * 84
 OUTPUT_PRICING = 0.30 * 10**-6 * 84
 
-def format_q_value(value):
+# Batching mode defaults: articles per request and estimated input tokens per request
+BATCH_SIZE = 5
+BATCH_TOKEN_BUDGET = 20000
+
+# Expected output tokens per analysed article, used to reserve tokens-per-minute quota before a call
+OUTPUT_TOKENS_PER_ARTICLE = 800
+
+class AnalysisCache:
+    def __init__(self, ttl=180 * 24 * 3600):
+        """
+        Persistent cache of parsed Gemini analyses and their token counts.
+
+        Keys combine the company, the prompt fingerprint (model, system instruction and schema) and a hash of
+        the article text sent, so a prompt or schema change automatically stops serving older analyses.
+
+        :param ttl: Seconds an analysis is kept
+        """
+        self.ttl = ttl
+        self._store = SQLiteCache("gemini_analysis.sqlite3", "gemini_analysis")
+
+    @staticmethod
+    def key(company_name, fingerprint, article):
+        """
+        :param company_name: Name of the company the article is analysed for.
+        :param fingerprint: prompt_fingerprint of the model configuration.
+        :param article: Article with 'Title' and 'Content'.
+        :return: Cache key.
+        """
+        message = format_article(article["Title"], article["Content"])
+        return f"{company_name}:{fingerprint}:{hashlib.sha256(message.encode('utf-8')).hexdigest()}"
+
+    def get_many(self, keys):
+        keys = list(keys)
+        entries = self._store.get_many(keys)
+        ANALYSIS_CACHE.inc(len(entries), result="hit")
+        ANALYSIS_CACHE.inc(len(set(keys)) - len(entries), result="miss")
+        return entries
+
+    def get(self, key):
+        entry = self._store.get(key)
+        ANALYSIS_CACHE.inc(result="miss" if entry is None else "hit")
+        return entry
+
+    def store(self, key, result, inp_tokens, out_tokens):
+        self._store.set(key, {"result": result, "inp_tokens": inp_tokens, "out_tokens": out_tokens}, self.ttl)
+
+_analysis_cache = None
+
+def get_analysis_cache():
+    """
+    :return: The process-wide analysis cache, created on first use.
+    """
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache()
+    return _analysis_cache
+
+def store_analysis(article, result, inp_tokens, out_tokens, key_field="AnalysisKey"):
+    """
+    Cache a parsed result under the article's key, if it has one.
+
+    :param key_field: 'AnalysisKey' for results of the single-article prompt, 'BatchAnalysisKey' for results
+        of the batch prompt, which has its own fingerprint
+    """
+    key = article.get(key_field)
+    if key:
+        get_analysis_cache().store(key, result, inp_tokens, out_tokens)
+
+def cached_analysis(entry, article):
+    """
+    :param entry: Analysis cache entry.
+    :param article: The article the entry was found for.
+    :return: The cached result with the article's date and link, and the token counts it originally cost.
+    """
+    return add_article_fields(dict(entry["result"]), article), entry["inp_tokens"], entry["out_tokens"]
+
+def add_article_fields(result, article):
+    """
+    Attach the article's date and link to a parsed Gemini result.
+
+    :param result: Parsed Gemini result dictionary.
+    :param article: The analysed article.
+    :return: The result dictionary.
+    """
+    result["date"] = article["Published_Date"]
+    result["link"] = article["ResolvedLink"]
+    return result
+
+def default_result(article_headline):
+    """
+    Result given to articles that are not sent to Gemini because they do not concern the company:
+    fully neutral, no red flag and N/A for every question, as Gemini itself answers for such articles.
+
+    :param article_headline: Headline of the article.
+    :return: Result dictionary in the same format as a parsed Gemini response.
+    """
+    result = {
+        "headline": article_headline,
+        "positive_sentiment": 0.0,
+        "negative_sentiment": 0.0,
+        "neutral_sentiment": 100.0,
+        "red_flag_score": 0,
+        "tags": [],
+        "unique_id": 0,
+    }
+    for field in article_schema().required:
+        if field.startswith("Q"):
+            result[field] = {"categorical": "N/A", "text": "N/A"}
+    return result
+
+def copy_representative_results(results_df, members):
+    """
+    Give near-duplicate articles the analysis of their cluster representative.
+
+    :param results_df: DataFrame of results, including those of the representatives.
+    :param members: List of (member article, representative link) tuples from split_near_duplicates.
+    :return: Results with the copies appended, and a '_cluster' column holding the representative link
+        of every row that belongs to a cluster.
+    """
+    results_by_link = {result["link"]: result for result in results_df.to_dict("records")}
+    copies = []
+    for article, representative in members:
+        if representative in results_by_link:
+            result = add_article_fields({**results_by_link[representative], "headline": article["Title"]}, article)
+            copies.append({**result, "_cluster": representative})
+    if not copies:
+        return results_df
+
+    clustered_links = {representative for _, representative in members}
+    results_df = results_df.assign(_cluster=results_df["link"].where(results_df["link"].isin(clustered_links)))
+    return pd.concat([results_df, pd.DataFrame(copies)], ignore_index=True)
+
+def make_batches(articles, batch_size=BATCH_SIZE, token_budget=BATCH_TOKEN_BUDGET):
+    """
+    Pack articles into batches bounded by article count and estimated input tokens.
+    An article larger than the token budget gets a batch of its own.
+
+    :param articles: List of article rows.
+    :param batch_size: Maximum articles per batch.
+    :param token_budget: Maximum estimated input tokens per batch.
+    :return: List of batches (lists of article rows).
+    """
+    batches, batch, batch_tokens = [], [], 0
+    for article in articles:
+        tokens = estimate_tokens(format_article(article["Title"], article["Content"]))
+        if batch and (len(batch) >= batch_size or batch_tokens + tokens > token_budget):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(article)
+        batch_tokens += tokens
+
+    if batch:
+        batches.append(batch)
+    return batches
+
+def count_tokens(inp_tokens, out_tokens):
+    GEMINI_TOKENS.inc(inp_tokens, direction="input")
+    GEMINI_TOKENS.inc(out_tokens, direction="output")
+
+async def process_batch(batch, chat_session):
     """
-    Format the 'Q' columns containing JSON-like data for readability.
+    Process several articles with a single Gemini request and split the response back into per-article results.
 
-    :param value: JSON-like string or dict.
-    :return: Formatted string or "Invalid data format".
+    :param batch: List of article rows.
+    :param chat_session: Chat session of a model built with batch_model_config.
+    :return: List of results aligned with the batch (None for articles missing from the response) and token counts.
     """
+    results = [None] * len(batch)
     try:
-        if isinstance(value, str):
-            data_dict = ast.literal_eval(value)
-        else:
-            data_dict = value
-    except (json.JSONDecodeError, ValueError):
-        return "Invalid data format"
+        articles = [(article["Title"], article["Content"]) for article in batch]
+        estimated_tokens = sum(estimate_tokens(format_article(*article)) + OUTPUT_TOKENS_PER_ARTICLE for article in articles)
+        response = await get_gemini_scheduler().submit(
+            batch_model_output, articles, chat_session,
+            priority=date_priority(batch[0]["Published_Date"]), estimated_tokens=estimated_tokens,
+        )
+        inp_tokens = response.usage_metadata.prompt_token_count
+        out_tokens = response.usage_metadata.candidates_token_count
+        count_tokens(inp_tokens, out_tokens)
+    except Exception as e:
+        logger.error(f"Error processing batch of {len(batch)} articles. Error: {e}")
+        return results, 0, 0
 
-    categorical = data_dict.get('categorical', 'N/A')
-    text = data_dict.get('text', 'N/A')
+    try:
+        items = json.loads(response.text)
+    except Exception as e:
+        # Typically a response truncated at max_output_tokens
+        logger.error(f"Unreadable response for batch of {len(batch)} articles. Error: {e}")
+        return results, inp_tokens, out_tokens
 
-    if categorical == 'N/A' and text == 'N/A':
-        return "N/A"
-    elif text == "N/A":
-        return categorical
-    else:
-        return f"{categorical}\n{text}"
+    for item in items if isinstance(items, list) else []:
+        index = item.pop("article_index", None) if isinstance(item, dict) else None
+        if isinstance(index, (int, float)) and int(index) == index and 0 <= index < len(batch) and results[int(index)] is None:
+            article = batch[int(index)]
+            await asyncio.to_thread(store_analysis, article, item, inp_tokens / len(batch), out_tokens / len(batch),
+                                    "BatchAnalysisKey")
+            results[int(index)] = add_article_fields(item, article)
+
+    return results, inp_tokens, out_tokens
 
 async def process_article(article, chat_session):
     """
@@ -59,60 +244,114 @@ async def process_article(article, chat_session):
         article_content = article["Content"]
         logger.debug(f"Processing article: {article_headline}.")
 
-        # Call the synchronous model output in a thread
-        response = await asyncio.to_thread(model_output, article_headline, article_content, chat_session)
+        # Call the synchronous model output through the shared, rate-limited scheduler
+        estimated_tokens = estimate_tokens(format_article(article_headline, article_content)) + OUTPUT_TOKENS_PER_ARTICLE
+        response = await get_gemini_scheduler().submit(
+            model_output, article_headline, article_content, chat_session,
+            priority=date_priority(article["Published_Date"]), estimated_tokens=estimated_tokens,
+        )
 
         # Extract result and token usage
         result = json.loads(response.text)
-        result["date"] = article["Published_Date"]
-        result["link"] = article["ResolvedLink"]
         inp_tokens = response.usage_metadata.prompt_token_count
         out_tokens = response.usage_metadata.candidates_token_count
+        count_tokens(inp_tokens, out_tokens)
+        await asyncio.to_thread(store_analysis, article, result, inp_tokens, out_tokens)
+        result = add_article_fields(result, article)
 
         return result, inp_tokens, out_tokens
     except Exception as e:
         logger.error(f"Error processing article: {article['Title']}. Error: {e}")
         return None, 0, 0
 
-async def process_chunk(chunk, model):
+def analysis_mode(stateless, batched):
+    """
+    :return: Label of the analysis mode, used when reporting token use.
+    """
+    return f"{'stateless' if stateless else 'chat history'}{', batched' if batched else ''}"
+
+async def process_chunk(chunk, model, batch_model=None, batch_size=BATCH_SIZE, token_budget=BATCH_TOKEN_BUDGET,
+                        stateless=False):
     """
     Process all articles in a single date chunk.
 
+    By default the day's articles share one chat session, so every request re-sends the earlier articles
+    of the day as history. In stateless mode each request starts from an empty history instead.
+
     :param chunk: DataFrame containing articles for a single date.
     :param model: Gemini model instance.
+    :param batch_model: Gemini model built with batch_model_config; enables batching mode when given.
+    :param batch_size: Maximum articles per request in batching mode.
+    :param token_budget: Maximum estimated input tokens per request in batching mode.
+    :param stateless: Send each request without the day's chat history.
     :return: List of processed results and token counts.
     """
     curr_date = chunk["Published_Date"].values[0]
     logger.info(f"Processing articles for date: {curr_date}.")
-    chat_session = start_history(model)
 
     chunk_results = []
     chunk_inp_tokens = 0
     chunk_out_tokens = 0
+    requests = 0
 
-    for _, article in chunk.iterrows():
-        result, inp_tokens, out_tokens = await process_article(article, chat_session)
+    articles = chunk.to_dict("records")
+    if batch_model is not None:
+        batches = make_batches(articles, batch_size, token_budget)
+        if stateless:
+            # Independent requests: let the scheduler run them concurrently
+            batch_outputs = await asyncio.gather(*(process_batch(batch, start_history(batch_model)) for batch in batches))
+        else:
+            batch_session = start_history(batch_model)
+            batch_outputs = [await process_batch(batch, batch_session) for batch in batches]
+
+        failed = []
+        for batch, (results, inp_tokens, out_tokens) in zip(batches, batch_outputs):
+            requests += 1
+            chunk_results.extend(result for result in results if result)
+            failed.extend(article for article, result in zip(batch, results) if result is None)
+            chunk_inp_tokens += inp_tokens
+            chunk_out_tokens += out_tokens
+
+        if failed:
+            logger.warning(f"Retrying {len(failed)} of {len(articles)} articles individually for date: {curr_date}.")
+        articles = failed
+
+    if stateless:
+        outputs = await asyncio.gather(*(process_article(article, start_history(model)) for article in articles))
+    else:
+        chat_session = start_history(model) if articles else None
+        outputs = [await process_article(article, chat_session) for article in articles]
+
+    for result, inp_tokens, out_tokens in outputs:
+        requests += 1
         if result:
             chunk_results.append(result)
         chunk_inp_tokens += inp_tokens
         chunk_out_tokens += out_tokens
 
-    logger.info(f"Finished processing for date: {curr_date}. Tokens used: {chunk_inp_tokens + chunk_out_tokens}.")
+    logger.info(f"Finished processing for date: {curr_date}. Requests: {requests}. "
+                f"Tokens used: {chunk_inp_tokens + chunk_out_tokens}.")
     return chunk_results, chunk_inp_tokens, chunk_out_tokens
 
-async def process_all_chunks(date_chunks, model):
+async def process_all_chunks(date_chunks, model, batch_model=None, batch_size=BATCH_SIZE, token_budget=BATCH_TOKEN_BUDGET,
+                             stateless=False):
     """
-    Process all date chunks concurrently.
+    Process all date chunks concurrently. The shared Gemini scheduler bounds how many calls are in flight
+    and starts the articles of the latest dates first.
 
     :param date_chunks: List of DataFrames grouped by date.
     :param model: Gemini model instance.
+    :param batch_model: Gemini model built with batch_model_config; enables batching mode when given.
+    :param batch_size: Maximum articles per request in batching mode.
+    :param token_budget: Maximum estimated input tokens per request in batching mode.
+    :param stateless: Send each request without the day's chat history.
     :return: DataFrame of all processed results.
     """
     all_results = []
     total_inp_tokens = 0
     total_out_tokens = 0
 
-    tasks = [process_chunk(chunk, model) for chunk in date_chunks]
+    tasks = [process_chunk(chunk, model, batch_model, batch_size, token_budget, stateless) for chunk in date_chunks]
     for chunk_results, chunk_inp_tokens, chunk_out_tokens in await asyncio.gather(*tasks):
         all_results.extend(chunk_results)
         total_inp_tokens += chunk_inp_tokens
@@ -120,46 +359,126 @@ async def process_all_chunks(date_chunks, model):
 
         logger.debug(f"Chunk cost: Rs-{chunk_inp_tokens * INPUT_PRICING + chunk_out_tokens * OUTPUT_PRICING:.2f}.")
 
-    logger.info(f"Total tokens used: {total_inp_tokens + total_out_tokens}. "
+    logger.info(f"Total tokens used ({analysis_mode(stateless, batch_model is not None)} mode): "
+                f"{total_inp_tokens + total_out_tokens} (input {total_inp_tokens}, output {total_out_tokens}). "
                 f"Total cost: Rs-{total_inp_tokens * INPUT_PRICING + total_out_tokens * OUTPUT_PRICING:.2f}.")
     return pd.DataFrame(all_results)
 
-async def process_articles(df, company_name):
+async def process_articles(df, company_name, batch_size=1, token_budget=BATCH_TOKEN_BUDGET, stateless=False,
+                           use_cache=True, relevance_filter=None, max_content_tokens=CONTENT_TOKEN_BUDGET,
+                           near_duplicates=True):
     """
     Entry point for processing articles.
 
     :param df: DataFrame containing article data.
     :param company_name: Name of the company for model configuration.
+    :param batch_size: Articles per Gemini request; values above 1 enable batching mode (e.g. BATCH_SIZE).
+    :param token_budget: Maximum estimated input tokens per request in batching mode.
+    :param stateless: Analyse without per-date chat history; unique_id is then assigned by a separate headline pass.
+    :param use_cache: Reuse analyses of identical articles scored before with the same prompt and schema.
+        Cached analyses were not part of this run's chat history, so in chat history mode a run with cache
+        hits has its unique_ids assigned from the headlines, as in stateless mode.
+    :param relevance_filter: RelevanceFilter; articles it rejects get default_result instead of a Gemini call.
+    :param max_content_tokens: Estimated token budget of each article's content (see ContentBudget); None disables trimming.
+    :param near_duplicates: Analyse one article per cluster of near-duplicates (e.g. syndicated copies of a
+        wire story) and copy its result to the other copies, which share its unique_id. In chat history mode
+        unique_id is numbered per date, so only copies published on the representative's date are matched.
     :return: DataFrame containing processed article results with the cols:
     Q1,	Q2,	Q3,	Q4,	Q5,	Q6,	Q7,	Q8,	Q9,	headline, negative_sentiment, neutral_sentiment, positive_sentiment, red_flag_score, tags, unique_id, date, link.
     """
-    # Group data by date
-    date_chunks = [group for _, group in df.groupby("Published_Date")]
-
     # Initialize the model
     config = model_config()
     model = initiate_model(company_name, config)
+    batch_model = initiate_model(company_name, batch_model_config()) if batch_size > 1 else None
+
+    # Articles that do not concern the company get the default neutral result without a Gemini call
+    local_results = []
+    if relevance_filter is not None and not df.empty:
+        relevant = pd.Series([relevance_filter.is_relevant(article) for article in df.to_dict("records")], index=df.index)
+        local_results += [add_article_fields(default_result(article["Title"]), article)
+                          for article in df[~relevant].to_dict("records")]
+        logger.info(f"Relevance filter: {(~relevant).sum()} of {len(df)} articles skipped without a Gemini call.")
+        df = df[relevant]
+
+    # Only one article per cluster of near-duplicates is sent to Gemini
+    members = []
+    if near_duplicates and not df.empty:
+        df, members = split_near_duplicates(df, NearDuplicateIndex(max_day_gap=1 if stateless else 0))
+
+    # Trim long articles to their lead and the paragraphs mentioning the company
+    if max_content_tokens and not df.empty:
+        content_budget = ContentBudget(company_name, max_content_tokens)
+        df = df.assign(Content=[content_budget.apply(title, content) for title, content in zip(df["Title"], df["Content"])])
+        logger.info(f"Content budget: {content_budget.stats()['truncated']} articles trimmed, "
+                    f"about {content_budget.stats()['tokens_saved']} input tokens saved.")
+
+    # Serve articles scored before from the cache and only send the rest to Gemini
+    cache_hits = 0
+    if use_cache and not df.empty:
+        fingerprint = prompt_fingerprint(company_name, config)
+        df = df.assign(AnalysisKey=[AnalysisCache.key(company_name, fingerprint, article) for article in df.to_dict("records")])
+        keys = df["AnalysisKey"].tolist()
+        if batch_model is not None:
+            # Batch results come from another prompt and schema, so they are cached under their own fingerprint
+            # and only served to batching runs; single-article results serve both
+            batch_fingerprint = prompt_fingerprint(company_name, batch_model_config())
+            df = df.assign(BatchAnalysisKey=[AnalysisCache.key(company_name, batch_fingerprint, article)
+                                             for article in df.to_dict("records")])
+            keys += df["BatchAnalysisKey"].tolist()
+        entries = await asyncio.to_thread(get_analysis_cache().get_many, keys)
+        found = [entries.get(article["AnalysisKey"]) or entries.get(article.get("BatchAnalysisKey"))
+                 for article in df.to_dict("records")]
+        hits = pd.Series([entry is not None for entry in found], index=df.index)
+        cached_results = [cached_analysis(entry, article) for entry, article in zip(found, df.to_dict("records"))
+                          if entry is not None]
+        saved_tokens = sum(inp_tokens + out_tokens for _, inp_tokens, out_tokens in cached_results)
+        logger.info(f"Analysis cache: {len(cached_results)} of {len(df)} articles served from cache, "
+                    f"about {saved_tokens:.0f} tokens saved.")
+        local_results += [result for result, _, _ in cached_results]
+        cache_hits = len(cached_results)
+        df = df[~hits]
+
+    # Group data by date
+    date_chunks = [group for _, group in df.groupby("Published_Date")]
 
     # Process all chunks
-    results_df = await process_all_chunks(date_chunks, model)
+    results_df = await process_all_chunks(date_chunks, model, batch_model, batch_size, token_budget, stateless)
+    if local_results:
+        results_df = pd.concat([results_df, pd.DataFrame(local_results)], ignore_index=True)
+    if members and not results_df.empty:
+        results_df = copy_representative_results(results_df, members)
+    if (local_results or members) and not results_df.empty:
+        results_df = results_df.sort_values(by="date", kind="stable").reset_index(drop=True)
 
-    # Format 'Q' columns if they exist
-    q_cols = [col for col in results_df.columns if col.startswith('Q')]
-    for col in q_cols:
-        results_df[col] = results_df[col].apply(format_q_value)
+    # Without the day's history (or with cached analyses that were not part of it) the model cannot match
+    # stories, so group them by headline instead
+    if stateless or cache_hits:
+        results_df = assign_unique_ids(results_df, group_col="_cluster" if "_cluster" in results_df else None)
+    results_df = results_df.drop(columns="_cluster", errors="ignore")
 
-    return results_df
+    # Format 'Q' columns if they exist
+    return format_q_columns(results_df)
 
-def process_articles_sync(df, company_name):
+def process_articles_sync(df, company_name, batch_size=1, token_budget=BATCH_TOKEN_BUDGET, stateless=False,
+                          use_cache=True, relevance_filter=None, max_content_tokens=CONTENT_TOKEN_BUDGET,
+                          near_duplicates=True):
     """
     Synchronous wrapper for processing articles.
     
     :param df: DataFrame containing article data.
     :param company_name: Name of the company for model configuration.
+    :param batch_size: Articles per Gemini request; values above 1 enable batching mode.
+    :param token_budget: Maximum estimated input tokens per request in batching mode.
+    :param stateless: Analyse without per-date chat history.
+    :param use_cache: Reuse analyses of identical articles scored before.
+    :param relevance_filter: RelevanceFilter; articles it rejects are not sent to Gemini.
+    :param max_content_tokens: Estimated token budget of each article's content; None disables trimming.
+    :param near_duplicates: Analyse one article per cluster of near-duplicates and copy its result to the others.
     :return: DataFrame containing processed article results.
     """
     # Run the asynchronous code in a synchronous context
-    return asyncio.run(process_articles(df, company_name))
+    return asyncio.run(process_articles(df, company_name, batch_size, token_budget, stateless, use_cache,
+                                        relevance_filter, max_content_tokens, near_duplicates))
 
 # Usage example
 if __name__ == "__main__":
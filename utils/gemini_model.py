@@ -1,24 +1,29 @@
+import hashlib
+import json
 import logging
 import google.generativeai as genai
 from google.ai.generativelanguage_v1beta.types import content
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 import os
 
+from utils.metrics import get_metrics
+
 genai.configure(api_key=os.environ["GEMINI_API_KEY"])
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
-def model_config():
-    logger.info("Setting up the model configuration.")
-    # Create the model
-    generation_config = {
-    "temperature": 1,
-    "top_p": 0.95,
-    "top_k": 40,
-    "max_output_tokens": 8192,
-    "response_schema": content.Schema(
+MODEL_NAME = "gemini-1.5-flash-8b"
+
+GEMINI_CALL_SECONDS = get_metrics().histogram("gemini_call_seconds", "Duration of one Gemini request, without quota waits.",
+                                              ["mode"])
+
+def article_schema():
+    """
+    :return: Response schema of the analysis of a single article.
+    """
+    return content.Schema(
         type = content.Type.OBJECT,
         description = "Schema for analyzing financial sentiment, red flag scoring, and answering financial analysis questions of news headlines.",
         required = [
@@ -220,16 +225,71 @@ def model_config():
                 },
             ),
         },
-    ),
+    )
+
+def model_config():
+    logger.info("Setting up the model configuration.")
+    # Create the model
+    generation_config = {
+    "temperature": 1,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 8192,
+    "response_schema": article_schema(),
     "response_mime_type": "application/json",
     }
     
     return generation_config
 
+def batch_model_config():
+    """
+    Configuration for analysing several articles per request: an array with one result per article,
+    each keyed by the index of the article in the request.
+
+    :return: Generation config for initiate_model.
+    """
+    logger.info("Setting up the batch model configuration.")
+    single = article_schema()
+    generation_config = model_config()
+    generation_config["response_schema"] = content.Schema(
+        type = content.Type.ARRAY,
+        description = "One analysis per article of the request, in any order.",
+        items = content.Schema(
+            type = content.Type.OBJECT,
+            description = single.description,
+            required = ["article_index", *single.required],
+            properties = {
+                "article_index": content.Schema(
+                    type = content.Type.INTEGER,
+                    description = "Index of the analysed article, as given in the request.",
+                ),
+                **single.properties,
+            },
+        ),
+    )
+    return generation_config
+
+def system_instruction(company_name):
+    return f"You are a financial expert with the skillset of a professional quantitative trader and investment analyst responsible for analysing \nCompany_name: {company_name}\nYour task is to analyze the news articles with content relevant to {company_name} and assign financial sentiment scores (positive, negative, and neutral) and a red flag score (all on a scale of 0-100). Red flag scores should be based on events or information that are significantly detrimental for the company (drop in stock price is not a red flag but mostly an after effect of the redflag event. Give higher red flag scores for the redflag event). If an article content is not relevant to {company_name}, assign full neutral score and other scores 0. Scoring must be strictly based on the information from news articles relevant to {company_name}, reflecting the potential financial impact of the information on stock price and investment decisions. Emphasize the scoring based on how these news would affect the {company_name} company’s financial outlook. Assign relevant tags(no more than 3) to the articles. Assign same unique_id to articles that deal with the same incident by comparing the article headlines. Ensure each unique story receives only one unique ID. \n\nAdditionally, evaluate the following questions based on the information from the news articles using a combination of categorical (given in json schema) and contextual answers (4 lines for each answer N/A if no relevant info):\n\nAre there any regulatory or legal issues faced by {company_name} or its subsidiaries?\nAre there any legal issues faced by the promoters of {company_name}?\nHas {company_name} faced employee attrition in the past, and has the key management team of {company_name} changed in the past 2 years?\nIs the industry in which {company_name} operates facing a slowdown?\nIs {company_name} overvalued compared to its peers?\nAre there any significant upcoming events or product launches that could impact {company_name}'s performance?\nHas {company_name} revenue, operating profit margins, and net profit margins grown year-on-year for the past 3 years, and are these better than industry growth rates?\nHas {company_name} debt increased or decreased over the past 3 years?\nHas {company_name} capacity utilization increased or decreased over the past 3 years, and how much capacity has {company_name} added in the past 3 years?\nHas the promoter stake in {company_name} increased or decreased in the past?\nHas the institutional stake in {company_name} increased or decreased in the past?\nHow many analysts are tracking {company_name} stock, and what is the percentage upside on the target price given by these analysts?\n\nThe answers must be specifically relevant to {company_name} and must be based on the news article content. Include a one line justification of the answer as well. If no relevant information is available for any question, use \"N/A\" as the answer."
+
+def prompt_fingerprint(company_name, config):
+    """
+    Hash of everything that shapes an analysis besides the article itself: model, system instruction and
+    generation config (including the response schema). Any prompt or schema change yields a new fingerprint.
+
+    :param company_name: Name of the company
+    :param config: Generation config, as returned by model_config
+    :return: Hex digest
+    """
+    config = {key: (type(value).to_dict(value) if isinstance(value, content.Schema) else value)
+              for key, value in config.items()}
+    payload = json.dumps([MODEL_NAME, system_instruction(company_name), config], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
 def initiate_model(company_name, config):
     logger.info(f"Initializing the model for company: {company_name}.")
     model = genai.GenerativeModel(
-    model_name="gemini-1.5-flash-8b",
+    model_name=MODEL_NAME,
     generation_config=config,
     safety_settings={
         HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
@@ -237,7 +297,7 @@ def initiate_model(company_name, config):
         HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
         HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE
     },
-    system_instruction=f"You are a financial expert with the skillset of a professional quantitative trader and investment analyst responsible for analysing \nCompany_name: {company_name}\nYour task is to analyze the news articles with content relevant to {company_name} and assign financial sentiment scores (positive, negative, and neutral) and a red flag score (all on a scale of 0-100). Red flag scores should be based on events or information that are significantly detrimental for the company (drop in stock price is not a red flag but mostly an after effect of the redflag event. Give higher red flag scores for the redflag event). If an article content is not relevant to {company_name}, assign full neutral score and other scores 0. Scoring must be strictly based on the information from news articles relevant to {company_name}, reflecting the potential financial impact of the information on stock price and investment decisions. Emphasize the scoring based on how these news would affect the {company_name} company’s financial outlook. Assign relevant tags(no more than 3) to the articles. Assign same unique_id to articles that deal with the same incident by comparing the article headlines. Ensure each unique story receives only one unique ID. \n\nAdditionally, evaluate the following questions based on the information from the news articles using a combination of categorical (given in json schema) and contextual answers (4 lines for each answer N/A if no relevant info):\n\nAre there any regulatory or legal issues faced by {company_name} or its subsidiaries?\nAre there any legal issues faced by the promoters of {company_name}?\nHas {company_name} faced employee attrition in the past, and has the key management team of {company_name} changed in the past 2 years?\nIs the industry in which {company_name} operates facing a slowdown?\nIs {company_name} overvalued compared to its peers?\nAre there any significant upcoming events or product launches that could impact {company_name}'s performance?\nHas {company_name} revenue, operating profit margins, and net profit margins grown year-on-year for the past 3 years, and are these better than industry growth rates?\nHas {company_name} debt increased or decreased over the past 3 years?\nHas {company_name} capacity utilization increased or decreased over the past 3 years, and how much capacity has {company_name} added in the past 3 years?\nHas the promoter stake in {company_name} increased or decreased in the past?\nHas the institutional stake in {company_name} increased or decreased in the past?\nHow many analysts are tracking {company_name} stock, and what is the percentage upside on the target price given by these analysts?\n\nThe answers must be specifically relevant to {company_name} and must be based on the news article content. Include a one line justification of the answer as well. If no relevant information is available for any question, use \"N/A\" as the answer.",
+    system_instruction=system_instruction(company_name),
     )
     return model
 
@@ -249,7 +309,40 @@ def start_history(model):
     )
     return chat_session
 
+def estimate_tokens(text):
+    """
+    Cheap local token estimate (about 4 characters per token), good enough for budgeting requests.
+
+    :param text: Text to estimate
+    :return: Estimated token count
+    """
+    return len(text) // 4 + 1
+
+def format_article(article_headline, article_content):
+    return f"headline:{article_headline} \n content: {article_content}"
+
+@GEMINI_CALL_SECONDS.timed(mode="single")
 def model_output(article_headline, article_content, chat_session):
     logger.info(f"Processing article: {article_headline}.")
-    response = chat_session.send_message(f"headline:{article_headline} \n content: {article_content}")
+    response = chat_session.send_message(format_article(article_headline, article_content))
+    return response
+
+@GEMINI_CALL_SECONDS.timed(mode="batch")
+def batch_model_output(articles, chat_session):
+    """
+    Analyse several articles in a single request. Requires a chat session of a model built with batch_model_config.
+
+    :param articles: List of (headline, content) tuples; their position is the article_index in the response
+    :param chat_session: Chat session object
+    :return: Model response
+    """
+    logger.info(f"Processing batch of {len(articles)} articles.")
+    message = "\n\n".join(
+        f"article_index: {index}\n{format_article(headline, article_content)}"
+        for index, (headline, article_content) in enumerate(articles)
+    )
+    response = chat_session.send_message(
+        f"Analyse each of the following {len(articles)} articles separately and return one result per article "
+        f"with its article_index.\n\n{message}"
+    )
     return response
\ No newline at end of file
@@ -0,0 +1,266 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from google.api_core import exceptions as google_exceptions
+
+from utils.adaptive_concurrency import LatencyHistogram
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Project quota, shared by every request of this process
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "1000"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "4000000"))
+GEMINI_MAX_WORKERS = int(os.getenv("GEMINI_MAX_WORKERS", "16"))
+
+# Throttling and server-side failures worth retrying
+RETRY_EXCEPTIONS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+)
+THROTTLE_EXCEPTIONS = (google_exceptions.TooManyRequests, google_exceptions.ResourceExhausted)
+
+
+def date_priority(published_date):
+    """
+    :param published_date: Published date of the article ('YYYY-MM-DD' or a datetime-like value)
+    :return: Scheduling priority; lower runs first, so later dates get lower numbers.
+    """
+    try:
+        return -date.fromisoformat(str(published_date)[:10]).toordinal()
+    except ValueError:
+        return 0
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        """
+        Thread-safe token bucket refilled continuously at `per_minute` tokens per minute, holding at most one minute's worth.
+
+        :param per_minute: Tokens added per minute (and bucket capacity)
+        """
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount=1):
+        """
+        Wait until `amount` tokens are available and take them. Amounts above the capacity are capped to it.
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    def adjust(self, amount):
+        """
+        Take (positive) or give back (negative) tokens after the fact, e.g. once actual usage is known.
+        The balance may go negative, delaying later requests.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self):
+        """
+        Empty the bucket, e.g. after the API reported that the quota is exhausted.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+    def available(self):
+        with self._lock:
+            self._refill()
+            return int(self.tokens)
+
+
+class PrioritySlots:
+    def __init__(self, max_slots):
+        """
+        Thread-safe counting semaphore whose waiters are served lowest priority value first,
+        usable from any number of event loops.
+
+        :param max_slots: Number of slots
+        """
+        self.max_slots = max_slots
+        self.in_use = 0
+        self._lock = threading.Lock()
+        self._waiters = []
+        self._counter = itertools.count()
+
+    async def acquire(self, priority=0):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_use < self.max_slots and not self._waiters:
+                self.in_use += 1
+                return
+            waiter = loop.create_future()
+            heapq.heappush(self._waiters, (priority, next(self._counter), loop, waiter))
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the cancellation
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                _, _, loop, waiter = heapq.heappop(self._waiters)
+                if waiter.done() or loop.is_closed():
+                    continue
+                # Hand the slot over directly, so in_use stays the same
+                loop.call_soon_threadsafe(self._wake, waiter)
+                return
+            self.in_use -= 1
+
+    def _wake(self, waiter):
+        if waiter.done():
+            # Cancelled after the hand-over was scheduled: pass the slot on
+            self.release()
+        else:
+            waiter.set_result(None)
+
+    def waiting(self):
+        with self._lock:
+            return len(self._waiters)
+
+
+class GeminiScheduler:
+    def __init__(self, rpm=GEMINI_RPM, tpm=GEMINI_TPM, max_workers=GEMINI_MAX_WORKERS, max_retries=4,
+                 backoff_base=1.0, backoff_max=60.0):
+        """
+        Process-wide scheduler for Gemini calls.
+
+        Every call waits for the shared requests-per-minute and tokens-per-minute buckets and for one of
+        `max_workers` worker threads. Waiting calls are started in priority order (latest dates first).
+        429 and 5xx errors are retried with jittered exponential backoff; a 429 also drains the request
+        bucket, so concurrent calls back off together. The quota is shared by all threads and event loops,
+        i.e. by concurrent Flask requests.
+
+        :param rpm: Requests per minute
+        :param tpm: Tokens per minute (input and output)
+        :param max_workers: Maximum concurrent Gemini calls
+        :param max_retries: Retries after the first attempt for 429/5xx errors
+        :param backoff_base: Base delay of the exponential backoff, in seconds
+        :param backoff_max: Upper bound of a single backoff delay, in seconds
+        """
+        self.request_bucket = TokenBucket(rpm)
+        self.token_bucket = TokenBucket(tpm)
+        self.slots = PrioritySlots(max_workers)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+        self._stats_lock = threading.Lock()
+        self.latency_histogram = LatencyHistogram()
+        self.outcomes = {"ok": 0, "retried": 0, "throttled": 0, "error": 0}
+
+    def _record(self, outcome, latency=None):
+        with self._stats_lock:
+            self.outcomes[outcome] += 1
+            if latency is not None:
+                self.latency_histogram.observe(latency)
+
+    async def submit(self, func, *args, priority=0, estimated_tokens=0):
+        """
+        Run a blocking Gemini call under the shared quota.
+
+        :param func: Blocking function making one Gemini request and returning its response
+        :param args: Arguments of func
+        :param priority: Lower values are started first (see date_priority)
+        :param estimated_tokens: Expected input + output tokens, corrected with the actual usage afterwards
+        :return: The function's return value.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(estimated_tokens)
+            await self.slots.acquire(priority)
+            start_time = time.monotonic()
+            try:
+                # Run in a copy of the caller's context, so the call is timed in its request_timings()
+                response = await loop.run_in_executor(self._executor, contextvars.copy_context().run, func, *args)
+            except RETRY_EXCEPTIONS as e:
+                if isinstance(e, THROTTLE_EXCEPTIONS):
+                    self._record("throttled")
+                    self.request_bucket.drain()
+                if attempt == self.max_retries:
+                    self._record("error")
+                    raise
+                self._record("retried")
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                logger.warning(f"Gemini call failed ({e.__class__.__name__}), retrying in {delay:.1f}s.")
+            except Exception:
+                self._record("error")
+                raise
+            else:
+                self._record("ok", time.monotonic() - start_time)
+                usage = getattr(response, "usage_metadata", None)
+                if usage is not None:
+                    self.token_bucket.adjust(usage.total_token_count - estimated_tokens)
+                return response
+            finally:
+                self.slots.release()
+
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        """
+        :return: Dictionary with quota headroom, concurrency, outcome counts and the latency histogram.
+        """
+        with self._stats_lock:
+            return {
+                "requests_available": self.request_bucket.available(),
+                "tokens_available": self.token_bucket.available(),
+                "in_flight": self.slots.in_use,
+                "waiting": self.slots.waiting(),
+                "max_workers": self.slots.max_slots,
+                "outcomes": dict(self.outcomes),
+                "latency_seconds": self.latency_histogram.snapshot(),
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_gemini_scheduler():
+    """
+    :return: The process-wide Gemini scheduler, created on first use.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = GeminiScheduler()
+        return _scheduler
@@ -2,68 +2,60 @@ import asyncio
 from datetime import datetime, timedelta, date
 import pandas as pd
 import time
-from gnews import GNews
 import logging
-from aiohttp import ClientSession, ClientTimeout
+from aiohttp import ClientSession
+
+from utils.article_store import get_article_store
+from utils.google_news_rss import search_news
+from utils.http_fetcher import create_session
+from utils.metrics import get_metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Edition searched on Google News
+NEWS_LANGUAGE = 'en'
+NEWS_COUNTRY = 'IN'
+
+NEWS_SEARCH_SECONDS = get_metrics().histogram("news_search_seconds", "Duration of one Google News window search.")
+NEWS_SEARCH_FAILURES = get_metrics().counter("news_search_failures_total", "Google News window searches that failed.")
+NEWS_SCRAPER_SECONDS = get_metrics().histogram("news_scraper_seconds", "Duration of news_scraper_RSS_links calls.")
+
+
 # Create an asynchronous function to fetch news for a specific interval
-async def fetch_news_for_interval(company_name: str, interval_start: str, interval_end: str, max_results: int = 100, session: ClientSession = None):
+async def fetch_news_for_interval(company_name: str, interval_start: str, interval_end: str, max_results: int = 100, session: ClientSession = None, raise_errors: bool = False):
     """
-    Fetch news articles for a specific time interval asynchronously.
+    Fetch news articles for a specific time interval asynchronously, from the Google News RSS search.
+    The request goes through the given session, so concurrent interval fetches share its keep-alive
+    connections; without a session a short-lived one is created.
+    A failed search returns no articles, or raises if raise_errors is set.
     """
     logger.info(f"Fetching articles for '{company_name}' from {interval_start} to {interval_end}.")
     start_time = time.time()
 
-    try:
-        google_news = GNews(language='en', country='IN', max_results=max_results, start_date=date.fromisoformat(interval_start), end_date=date.fromisoformat(interval_end))
-        search_results = await asyncio.to_thread(google_news.get_news, company_name)
-
-        articles = []
-        for result in search_results:
-            try:
-                link = result["url"]
-                date_published = datetime.strptime(result["published date"], '%a, %d %b %Y %H:%M:%S GMT').strftime('%Y-%m-%d')
-                title = result["title"]
-                if not title:
-                    raise ValueError("Title empty.")
-
-                article = {
-                    "Title": title,
-                    "Link": link,
-                    "Published_Date": date_published
-                }
-                articles.append(article)
-            except Exception as e:
-                logger.warning(f"Error processing article result: {e}", exc_info=True)
+    own_session = session is None
+    if own_session:
+        session = create_session()
 
+    try:
+        with NEWS_SEARCH_SECONDS.time():
+            articles = await search_news(session, company_name, date.fromisoformat(interval_start),
+                                         date.fromisoformat(interval_end), max_results, NEWS_LANGUAGE, NEWS_COUNTRY)
         logger.info(f"Fetched {len(articles)} articles for '{company_name}' from {interval_start} to {interval_end}.")
         return articles
     except Exception as e:
+        NEWS_SEARCH_FAILURES.inc()
         logger.error(f"Error in fetch_news_for_interval: {e}", exc_info=True)
+        if raise_errors:
+            raise
         return []
     finally:
+        if own_session:
+            await session.close()
         logger.debug(f"Interval fetch completed in {time.time() - start_time:.2f} seconds.")
 
 
-# Function to run the asynchronous tasks concurrently
-async def fetch_all_news(company_name: str, intervals: list, max_results: int = 100):
-    """
-    Fetch news articles asynchronously for all intervals.
-    """
-    tasks = []
-    async with ClientSession(timeout=ClientTimeout(total=10)) as session:
-        for interval_start, interval_end in intervals:
-            tasks.append(fetch_news_for_interval(company_name, interval_start, interval_end, max_results, session))
-
-        results = await asyncio.gather(*tasks)
-        
-    return results
-
-
 def get_days_from_period(period: str) -> int:
     """
     Converts a period string (e.g., '7d', '30d', '365d') to the number of days.
@@ -83,38 +75,211 @@ def get_days_from_period(period: str) -> int:
         raise ValueError("Invalid period format. Use 'd' for days.")
 
 
-def news_scraper_RSS_links(company_name: str, period: str, max_results: int = 100):
+def period_bounds(period: str) -> tuple:
     """
-    Scrapes news articles from Google News for a given company asynchronously over a split time period.
+    Converts a period string (e.g., '7d', '30d') ending today into a date range.
+
+    Args:
+    - period (str): The period string.
+
+    Returns:
+    - tuple: (start, end) dates; searches use them as 'after:start before:end'.
     """
-    logger.info(f"Starting news scraper for '{company_name}' with period '{period}'.")
-    start_time = time.time()
+    # Get the current date as the end date (only date, no time)
+    end_dt = datetime.now().date()
+    return end_dt - timedelta(days=get_days_from_period(period)), end_dt
 
-    try:
-        # Convert the period to the total number of days
-        total_days = get_days_from_period(period)
 
-        # Get the current date as the end date (only date, no time)
-        end_dt = datetime.now().date()
+# A window returning at least this fraction of max_results probably hit the cap and is split
+SATURATION_RATIO = 0.9
+# Windows are not split below this many days
+MIN_WINDOW_DAYS = 1
+# Upper bound of upstream calls per scrape, and of calls in flight at once
+MAX_CALLS = 64
+MAX_CONCURRENT_CALLS = 5
+
+
+async def iter_windows(company_name: str, ranges: list, max_results: int = 100,
+                       min_window_days: int = MIN_WINDOW_DAYS, max_calls: int = MAX_CALLS,
+                       concurrency: int = MAX_CONCURRENT_CALLS):
+    """
+    Asynchronously yield the articles of each searched time window, splitting saturated windows.
+
+    The search starts with one window per date range. Google News returns at most max_results
+    articles per search, so a window returning close to that many is split in two halves that are
+    searched in turn, until windows fall below the cap or reach min_window_days. Quiet periods thus
+    cost a single call, and busy ones get as many calls as their volume needs, up to max_calls.
+
+    Args:
+    - company_name (str): The search query.
+    - ranges (list): (start, end) dates to search, end excluded.
+    - max_results (int): Maximum results per search.
+    - min_window_days (int): Smallest window, in days.
+    - max_calls (int): Budget of searches; saturated windows are no longer split once it is used up.
+    - concurrency (int): Searches in flight at once.
+
+    Yields:
+    - tuple: (start, end, articles, complete) of one window. complete is False when the search failed,
+      or when the window was saturated but could not be split for lack of budget, so it may miss articles.
+      A split window yields its own articles as incomplete; its halves then cover it.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    stats = {"calls": 0, "failed": 0, "split": 0, "saturated_at_min_window": 0, "saturated_over_budget": 0}
+    pending = set()
+
+    async with create_session() as session:
+
+        async def search(window_start, window_end):
+            async with semaphore:
+                try:
+                    articles = await fetch_news_for_interval(company_name, window_start.isoformat(),
+                                                             window_end.isoformat(), max_results, session,
+                                                             raise_errors=True)
+                except Exception:
+                    return window_start, window_end, None
+            return window_start, window_end, articles
+
+        def schedule(window_start, window_end):
+            stats["calls"] += 1
+            pending.add(asyncio.ensure_future(search(window_start, window_end)))
+
+        try:
+            for range_start, range_end in ranges:
+                schedule(range_start, max(range_end, range_start + timedelta(days=1)))
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    window_start, window_end, articles = task.result()
+                    if articles is None:
+                        stats["failed"] += 1
+                        yield window_start, window_end, [], False
+                        continue
 
-        # Calculate the start date based on the total days
-        start_dt = end_dt - timedelta(days=total_days)
+                    complete = True
+                    window_days = (window_end - window_start).days
+                    if len(articles) >= SATURATION_RATIO * max_results:
+                        if window_days < 2 * min_window_days:
+                            stats["saturated_at_min_window"] += 1
+                        elif stats["calls"] + 2 > max_calls:
+                            stats["saturated_over_budget"] += 1
+                            complete = False
+                        else:
+                            stats["split"] += 1
+                            complete = False
+                            mid_dt = window_start + timedelta(days=window_days // 2)
+                            schedule(window_start, mid_dt)
+                            schedule(mid_dt, window_end)
 
-        # Split the date range into 5 equal intervals to get more results
-        num_intervals = 5
-        interval_days = total_days // num_intervals
+                    yield window_start, window_end, articles, complete
+        finally:
+            for task in pending:
+                task.cancel()
 
-        intervals = []
-        for i in range(num_intervals):
-            interval_start = (start_dt + timedelta(days=i * interval_days)).strftime('%Y-%m-%d')
-            interval_end = (start_dt + timedelta(days=(i + 1) * interval_days)).strftime('%Y-%m-%d')
-            if i == num_intervals - 1:  # Ensure the last interval goes up to the end date
-                interval_end = end_dt.strftime('%Y-%m-%d')
+    logger.info(f"Searched '{company_name}' over {len(ranges)} date ranges with {stats['calls']} calls: {stats}.")
+    if stats["saturated_over_budget"]:
+        logger.warning(f"Call budget of {max_calls} used up: {stats['saturated_over_budget']} windows "
+                       f"may be missing articles.")
 
-            intervals.append((interval_start, interval_end))
 
+async def iter_window_articles(company_name: str, period: str, max_results: int = 100,
+                               min_window_days: int = MIN_WINDOW_DAYS, max_calls: int = MAX_CALLS,
+                               concurrency: int = MAX_CONCURRENT_CALLS):
+    """
+    Asynchronously yield the articles of each searched time window of the period, see iter_windows.
+
+    Yields:
+    - list: Article rows of one window, as returned by fetch_news_for_interval.
+    """
+    async for _, _, articles, _ in iter_windows(company_name, [period_bounds(period)], max_results,
+                                                min_window_days, max_calls, concurrency):
+        yield articles
+
+
+async def iter_stored_window_articles(company_name: str, period: str, max_results: int = 100, store=None):
+    """
+    Asynchronously yield the articles of the period, searching only the days missing from the article store.
+
+    Stored articles of the period are yielded first as a single batch, then the articles of each window
+    searched over the missing date ranges. New articles are added to the store, and each completely
+    searched window is recorded as covered, so later scrapes of the same company skip it: a daily
+    refresh of a '365d' period searches a single day. Windows that failed or may be missing articles
+    are not recorded and are searched again next time.
+
+    Args:
+    - company_name (str): The search query.
+    - period (str): The period string, e.g. '365d'.
+    - max_results (int): Maximum results per search.
+    - store (ArticleStore): Store to use; the process-wide store by default.
+
+    Yields:
+    - list: Article rows, stored ones first.
+    """
+    store = store or get_article_store()
+    start_dt, end_dt = period_bounds(period)
+    missing = await asyncio.to_thread(store.missing_ranges, company_name, start_dt, end_dt)
+    stored = await asyncio.to_thread(store.get_articles, company_name, start_dt, end_dt)
+    missing_days = sum((end - start).days for start, end in missing)
+    logger.info(f"Article store has {len(stored)} articles of '{company_name}' over {period}; "
+                f"searching {missing_days} missing days in {len(missing)} date ranges.")
+    if stored:
+        yield stored
+    if not missing:
+        return
+
+    async for window_start, window_end, articles, complete in iter_windows(company_name, missing, max_results):
+        await asyncio.to_thread(store.add_articles, company_name, articles)
+        if complete:
+            await asyncio.to_thread(store.add_coverage, company_name, window_start, window_end)
+        # Searches may return articles dated outside their window
+        yield [article for article in articles
+               if start_dt.isoformat() <= article["Published_Date"] < end_dt.isoformat()]
+
+
+def _iter_period_articles(company_name: str, period: str, max_results: int, use_store: bool):
+    if use_store:
+        return iter_stored_window_articles(company_name, period, max_results)
+    return iter_window_articles(company_name, period, max_results)
+
+
+async def iter_news_RSS_links(company_name: str, period: str, max_results: int = 100, use_store: bool = True):
+    """
+    Asynchronously yield de-duplicated article rows as soon as each window search completes.
+
+    Unlike news_scraper_RSS_links, this does not wait for every window before returning,
+    so downstream stages can start working on the first results immediately. With use_store,
+    stored articles come first and only the missing days are searched, see iter_stored_window_articles.
+    """
+    seen = set()
+    async for articles in _iter_period_articles(company_name, period, max_results, use_store):
+        for article in articles:
+            key = (article["Title"], article["Link"], article["Published_Date"])
+            if key in seen:
+                continue
+            seen.add(key)
+            yield article
+
+
+async def fetch_all_news(company_name: str, period: str, max_results: int = 100, use_store: bool = True):
+    """
+    Fetch news articles asynchronously for all windows of the period.
+    """
+    return [articles async for articles in _iter_period_articles(company_name, period, max_results, use_store)]
+
+
+@NEWS_SCRAPER_SECONDS.timed()
+def news_scraper_RSS_links(company_name: str, period: str, max_results: int = 100, use_store: bool = True):
+    """
+    Scrapes news articles from Google News for a given company asynchronously over a split time period.
+    The period is split adaptively, see iter_windows. With use_store, only the days missing from the
+    article store are searched and the stored articles are merged in, see iter_stored_window_articles.
+    """
+    logger.info(f"Starting news scraper for '{company_name}' with period '{period}'.")
+    start_time = time.time()
+
+    try:
         # Run the async function to fetch news
-        results = asyncio.run(fetch_all_news(company_name, intervals, max_results))
+        results = asyncio.run(fetch_all_news(company_name, period, max_results, use_store))
 
         # Combine results into a DataFrame
         all_articles = []
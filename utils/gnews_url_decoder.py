@@ -0,0 +1,163 @@
+import asyncio
+import base64
+import json
+import logging
+import re
+from urllib.parse import urlparse
+
+import aiohttp
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+BATCH_EXECUTE_URL = "https://news.google.com/_/DotsSplashUi/data/batchexecute"
+ARTICLE_PAGE_URL = "https://news.google.com/rss/articles/{}"
+
+# Protobuf header of the legacy article token: field 1 = 19, then field 4 (length-delimited) holds the URL
+_TOKEN_PREFIX = b"\x08\x13\x22"
+
+_SIGNATURE_RE = re.compile(r'data-n-a-sg="([^"]+)"')
+_TIMESTAMP_RE = re.compile(r'data-n-a-ts="([^"]+)"')
+
+
+def get_article_id(link):
+    """
+    Extract the base64 article token from a Google News RSS link.
+
+    :param link: Google News link, e.g. https://news.google.com/rss/articles/CBMi...?oc=5
+    :return: The article token or None if the link is not a Google News article link.
+    """
+    parsed = urlparse(link)
+    if parsed.hostname != "news.google.com":
+        return None
+
+    parts = parsed.path.strip("/").split("/")
+    if len(parts) < 2 or parts[-2] not in ("articles", "read"):
+        return None
+    return parts[-1]
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while pos < len(data):
+        byte = data[pos]
+        result |= (byte & 0x7F) << shift
+        pos += 1
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+    raise ValueError("Truncated varint in article token.")
+
+
+def decode_offline(link):
+    """
+    Decode the publisher URL embedded in a legacy Google News article token, without any network access.
+
+    :param link: Google News link
+    :return: Publisher URL, or None if the token does not embed the URL (e.g. newer 'AU_yqL' tokens).
+    """
+    article_id = get_article_id(link)
+    if not article_id:
+        return None
+
+    try:
+        data = base64.urlsafe_b64decode(article_id + "=" * (-len(article_id) % 4))
+        if not data.startswith(_TOKEN_PREFIX):
+            return None
+
+        length, pos = _read_varint(data, len(_TOKEN_PREFIX))
+        url = data[pos:pos + length].decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    if url.startswith(("http://", "https://")):
+        return url
+    return None
+
+
+class GoogleNewsURLDecoder:
+    def __init__(self, max_concurrent_requests=20, timeout=10):
+        """
+        Resolve Google News article links without a browser.
+
+        Legacy tokens are decoded locally. Newer tokens are resolved with one lightweight GET for the
+        article signature plus one batchexecute POST, both over a shared aiohttp session.
+
+        :param max_concurrent_requests: Maximum number of concurrent HTTP resolutions
+        :param timeout: Total timeout per HTTP request in seconds
+        """
+        self.max_concurrent_requests = max_concurrent_requests
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
+
+    async def _fetch_signature(self, session, article_id):
+        async with session.get(ARTICLE_PAGE_URL.format(article_id), timeout=self.timeout) as response:
+            response.raise_for_status()
+            html = await response.text()
+
+        signature = _SIGNATURE_RE.search(html)
+        timestamp = _TIMESTAMP_RE.search(html)
+        if not signature or not timestamp:
+            raise ValueError("Article signature not found.")
+        return signature.group(1), timestamp.group(1)
+
+    async def _batch_execute(self, session, article_id, signature, timestamp):
+        request = [
+            "garturlreq",
+            [["X", "X", ["X", "X"], None, None, 1, 1, "US:en", None, 1, None, None, None, None, None, 0, 1],
+             "X", "X", 1, [1, 1, 1], 1, 1, None, 0, 0, None, 0],
+            article_id,
+            int(timestamp),
+            signature,
+        ]
+        payload = {"f.req": json.dumps([[["Fbv4je", json.dumps(request), None, "generic"]]])}
+        headers = {"Content-Type": "application/x-www-form-urlencoded;charset=UTF-8"}
+
+        async with session.post(BATCH_EXECUTE_URL, data=payload, headers=headers, timeout=self.timeout) as response:
+            response.raise_for_status()
+            text = await response.text()
+
+        # The body is an anti-XSSI prefix followed by length-prefixed JSON chunks
+        chunk = json.loads(text.split("\n\n")[1])[:-2]
+        return json.loads(chunk[0][2])[1]
+
+    async def decode(self, session, link):
+        """
+        Resolve a single Google News link.
+
+        :param session: aiohttp session used for the online fallback
+        :param link: Google News link
+        :return: Publisher URL or None if it could not be resolved without a browser.
+        """
+        url = decode_offline(link)
+        if url:
+            return url
+
+        article_id = get_article_id(link)
+        if not article_id:
+            return None
+
+        try:
+            async with self._semaphore:
+                signature, timestamp = await self._fetch_signature(session, article_id)
+                url = await self._batch_execute(session, article_id, signature, timestamp)
+        except Exception as e:
+            logger.debug(f"HTTP decoding failed for {link}: {e}")
+            return None
+
+        if isinstance(url, str) and url.startswith(("http://", "https://")) and not url.startswith("https://news.google.com"):
+            return url
+        return None
+
+    async def decode_links(self, session, links):
+        """
+        Resolve multiple Google News links concurrently.
+
+        :param session: aiohttp session used for the online fallback
+        :param links: List of Google News links
+        :return: Dictionary of rss links: resolved links (None where the browser is still needed)
+        """
+        results = await asyncio.gather(*(self.decode(session, link) for link in links))
+        return dict(zip(links, results))
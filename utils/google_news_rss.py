@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote, urlencode
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+import aiohttp
+
+from utils.http_fetcher import DEFAULT_FETCH_SETTINGS, RETRY_EXCEPTIONS, RETRY_STATUSES, _backoff_delay, _parse_retry_after
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+SEARCH_URL = "https://news.google.com/rss/search"
+
+_MONTHS = {month: number for number, month in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], start=1)}
+
+_CHUNK_SIZE = 16 * 1024
+
+
+class GoogleNewsError(Exception):
+    pass
+
+
+def build_search_url(query, start=None, end=None, language="en", country="IN"):
+    """
+    Build the Google News RSS search URL for a query, restricted with the 'after:' and 'before:' operators.
+
+    :param query: Search terms
+    :param start: First day to search (date), or None
+    :param end: Day after the last day to search (date), or None
+    :param language: Interface language, e.g. 'en'
+    :param country: Edition country, e.g. 'IN'
+    :return: The URL.
+    """
+    terms = [query]
+    if start is not None:
+        terms.append(f"after:{start.isoformat()}")
+    if end is not None:
+        terms.append(f"before:{end.isoformat()}")
+    params = {"q": " ".join(terms), "hl": language, "gl": country, "ceid": f"{country}:{language}"}
+    return f"{SEARCH_URL}?{urlencode(params, quote_via=quote)}"
+
+
+def parse_pub_date(value):
+    """
+    :param value: RSS pubDate, e.g. 'Fri, 17 Oct 2025 07:00:00 GMT'
+    :return: The day as 'YYYY-MM-DD'.
+    """
+    parts = value.split()
+    try:
+        # Fast path for the fixed RFC 822 layout Google News uses
+        return f"{int(parts[3]):04d}-{_MONTHS[parts[2]]:02d}-{int(parts[1]):02d}"
+    except (IndexError, KeyError, ValueError):
+        return parsedate_to_datetime(value).strftime("%Y-%m-%d")
+
+
+class RSSItemParser:
+    def __init__(self, max_results=None):
+        """
+        Incremental parser turning the <item> elements of an RSS feed into article rows
+        ('Title', 'Link', 'Published_Date') as the bytes arrive.
+
+        Parsed items are removed from the tree, so memory stays bounded by one item whatever the feed size.
+
+        :param max_results: Stop collecting after this many rows
+        """
+        self.max_results = max_results
+        self.rows = []
+        self.skipped = 0
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._channel = None
+
+    @property
+    def full(self):
+        return self.max_results is not None and len(self.rows) >= self.max_results
+
+    def feed(self, data):
+        """
+        Parse a chunk of the feed.
+
+        :return: The rows of the items completed by this chunk.
+        """
+        self._parser.feed(data)
+        return self._read_events()
+
+    def close(self):
+        """
+        Finish parsing; raises ParseError if the feed is truncated or malformed.
+
+        :return: The rows of the items completed by the end of the feed.
+        """
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self):
+        new_rows = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if element.tag == "channel":
+                    self._channel = element
+                continue
+            if element.tag != "item":
+                continue
+
+            if not self.full:
+                row = self._item_row(element)
+                if row is None:
+                    self.skipped += 1
+                else:
+                    new_rows.append(row)
+                    self.rows.append(row)
+            if self._channel is not None:
+                self._channel.remove(element)
+        return new_rows
+
+    def _item_row(self, item):
+        title = item.findtext("title")
+        link = item.findtext("link")
+        pub_date = item.findtext("pubDate")
+        if not title or not link or not pub_date:
+            return None
+        try:
+            published_date = parse_pub_date(pub_date)
+        except (TypeError, ValueError):
+            return None
+        return {"Title": title, "Link": link, "Published_Date": published_date}
+
+
+async def search_news(session, query, start=None, end=None, max_results=100, language="en", country="IN",
+                      settings=None):
+    """
+    Search Google News over a date range and parse the RSS response as it streams in.
+
+    Throttling and server errors are retried with the backoff of http_fetcher.
+
+    :param session: aiohttp session, shared across searches to reuse keep-alive connections
+    :param query: Search terms
+    :param start: First day to search (date)
+    :param end: Day after the last day to search (date)
+    :param max_results: Maximum rows returned
+    :param language: Interface language
+    :param country: Edition country
+    :param settings: FetchSettings for retries, defaults to DEFAULT_FETCH_SETTINGS
+    :return: List of article rows ('Title', 'Link', 'Published_Date').
+    """
+    settings = settings or DEFAULT_FETCH_SETTINGS
+    url = build_search_url(query, start, end, language, country)
+
+    for attempt in range(settings.max_retries + 1):
+        retry_after = None
+        try:
+            async with session.get(url) as response:
+                if response.status in RETRY_STATUSES:
+                    retry_after = _parse_retry_after(response.headers)
+                    raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                                      status=response.status)
+                if response.status != 200:
+                    raise GoogleNewsError(f"Google News returned status {response.status} for {url}")
+
+                parser = RSSItemParser(max_results)
+                async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                    parser.feed(chunk)
+                    if parser.full:
+                        break
+                else:
+                    parser.close()
+                if parser.skipped:
+                    logger.warning(f"Skipped {parser.skipped} unreadable items of {url}.")
+                return parser.rows
+        except ParseError as e:
+            raise GoogleNewsError(f"Malformed feed from {url}: {e}") from e
+        except (aiohttp.ClientResponseError, *RETRY_EXCEPTIONS) as e:
+            if attempt == settings.max_retries:
+                raise GoogleNewsError(f"Failed to fetch {url} after {attempt + 1} attempts: {e!r}") from e
+            delay = _backoff_delay(attempt, settings, retry_after)
+            logger.debug(f"Retrying {url} in {delay:.2f}s after {e!r}")
+            await asyncio.sleep(delay)
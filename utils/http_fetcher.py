@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import random
+import aiohttp
+
+# Set up logging configuration
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: throttling and server-side failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Transport-level failures worth retrying
+RETRY_EXCEPTIONS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+DEFAULT_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                      "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+class FetchSettings:
+    def __init__(self, total_limit=100, per_host_limit=6, keepalive_timeout=30, dns_cache_ttl=300,
+                 request_timeout=20, connect_timeout=8, read_timeout=15, batch_timeout=300,
+                 max_retries=2, backoff_base=0.5, backoff_max=8, max_response_bytes=5 * 1024 * 1024,
+                 user_agent=DEFAULT_USER_AGENT):
+        """
+        Tuning knobs for article fetching.
+
+        Args:
+            total_limit (int): Maximum simultaneous connections overall.
+            per_host_limit (int): Maximum simultaneous connections to a single host.
+            keepalive_timeout (float): Seconds an idle keep-alive connection is kept open.
+            dns_cache_ttl (int): Seconds DNS lookups are cached.
+            request_timeout (float): Total time allowed for a single request attempt, in seconds.
+            connect_timeout (float): Time allowed to establish a connection, in seconds.
+            read_timeout (float): Maximum gap between two reads of the response, in seconds.
+            batch_timeout (float): Overall deadline for a whole batch of URLs, in seconds.
+            max_retries (int): Retries after the first attempt for 5xx, 429 and connection errors.
+            backoff_base (float): Base delay of the exponential backoff, in seconds.
+            backoff_max (float): Upper bound of a single backoff delay, in seconds.
+            max_response_bytes (int): Responses larger than this are dropped.
+            user_agent (str): User-Agent header sent with every request.
+        """
+        self.total_limit = total_limit
+        self.per_host_limit = per_host_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.request_timeout = request_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.batch_timeout = batch_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_response_bytes = max_response_bytes
+        self.user_agent = user_agent
+
+
+DEFAULT_FETCH_SETTINGS = FetchSettings()
+
+
+def create_session(settings=None):
+    """
+    Create an aiohttp session with a tuned connector (per-host limits, keep-alive, DNS caching) and timeouts.
+
+    Args:
+        settings (FetchSettings): Fetch settings, defaults to DEFAULT_FETCH_SETTINGS.
+
+    Returns:
+        aiohttp.ClientSession: The session; the caller is responsible for closing it.
+    """
+    settings = settings or DEFAULT_FETCH_SETTINGS
+    connector = aiohttp.TCPConnector(
+        limit=settings.total_limit,
+        limit_per_host=settings.per_host_limit,
+        keepalive_timeout=settings.keepalive_timeout,
+        ttl_dns_cache=settings.dns_cache_ttl,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=settings.request_timeout,
+        sock_connect=settings.connect_timeout,
+        sock_read=settings.read_timeout,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, headers={"User-Agent": settings.user_agent})
+
+
+def _backoff_delay(attempt, settings, retry_after=None):
+    if retry_after is not None:
+        return min(settings.backoff_max, retry_after)
+    # Full jitter: spreads out retries from many concurrent requests to the same host
+    return random.uniform(0, min(settings.backoff_max, settings.backoff_base * 2 ** attempt))
+
+
+def _parse_retry_after(headers):
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def _read_capped(response, max_bytes):
+    if response.content_length is not None and response.content_length > max_bytes:
+        raise ResponseTooLarge(f"Content-Length {response.content_length} exceeds {max_bytes} bytes")
+
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        size += len(chunk)
+        if size > max_bytes:
+            raise ResponseTooLarge(f"Response exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def fetch_with_retries(session, url, settings=None, headers=None):
+    """
+    GET a URL with jittered exponential-backoff retries for 5xx/429 responses and connection errors.
+
+    Args:
+        session (aiohttp.ClientSession): The session to make the request, ideally from create_session().
+        url (str): The URL to fetch.
+        settings (FetchSettings): Fetch settings, defaults to DEFAULT_FETCH_SETTINGS.
+        headers (dict): Extra request headers, e.g. If-None-Match.
+
+    Returns:
+        tuple: (status, body bytes or None, response headers). The body is only set for 2xx responses
+        within the size cap. Status is None if no response was received after all retries.
+    """
+    settings = settings or DEFAULT_FETCH_SETTINGS
+    status, response_headers = None, {}
+
+    for attempt in range(settings.max_retries + 1):
+        retry_after = None
+        try:
+            async with session.get(url, headers=headers) as response:
+                status, response_headers = response.status, response.headers
+                if status in RETRY_STATUSES:
+                    retry_after = _parse_retry_after(response.headers)
+                    raise aiohttp.ClientResponseError(response.request_info, response.history, status=status)
+                if not 200 <= status < 300:
+                    return status, None, response_headers
+                return status, await _read_capped(response, settings.max_response_bytes), response_headers
+        except ResponseTooLarge as e:
+            logger.debug(f"Dropping {url}: {e}")
+            return status, None, response_headers
+        except (aiohttp.ClientResponseError, *RETRY_EXCEPTIONS) as e:
+            if attempt == settings.max_retries:
+                logger.debug(f"Failed to fetch URL {url} after {attempt + 1} attempts: {e!r}")
+                break
+            delay = _backoff_delay(attempt, settings, retry_after)
+            logger.debug(f"Retrying {url} in {delay:.2f}s after {e!r}")
+            await asyncio.sleep(delay)
+        except Exception as e:
+            logger.debug(f"Failed to fetch URL {url}: {e!r}")
+            break
+
+    return status, None, response_headers
+
@@ -0,0 +1,180 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Jobs run at the same time; further jobs wait in the queue
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Seconds a finished job and its result are kept for polling
+JOB_TTL = int(os.getenv("JOB_TTL", "3600"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class Job:
+    def __init__(self, kind, key):
+        """
+        A unit of background work and its state, as reported by the status endpoint.
+
+        :param kind: Job type, e.g. 'scraper-score'
+        :param key: Identity of the request; in-flight jobs with the same kind and key are merged
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.requests = 1
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def set_progress(self, stage, value):
+        """
+        Record the progress of a stage, e.g. the number of articles it has passed. Called from the job's function.
+        """
+        with self._lock:
+            self.progress[stage] = value
+
+    def update_progress(self, progress):
+        """
+        Record the progress of several stages at once.
+        """
+        with self._lock:
+            self.progress.update(progress)
+
+    @property
+    def done(self):
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self):
+        """
+        :return: JSON-serialisable status of the job, without its result.
+        """
+        with self._lock:
+            progress = dict(self.progress)
+        end = self.finished_at or time.time()
+        return {
+            "jobId": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": progress,
+            "error": self.error,
+            "requests": self.requests,
+            "createdAt": self.created_at,
+            "queuedSeconds": round((self.started_at or end) - self.created_at, 2),
+            "runSeconds": round(end - self.started_at, 2) if self.started_at else None,
+        }
+
+
+class JobQueue:
+    def __init__(self, max_workers=JOB_WORKERS, ttl=JOB_TTL):
+        """
+        In-process queue running long analyses on a worker pool, outside the request threads.
+
+        Submitting returns a Job at once; clients poll its status and fetch the result when it succeeds.
+        A submission identical to a queued or running job (same kind and key) is merged into that job
+        instead of running the work twice. Finished jobs are kept for `ttl` seconds.
+
+        :param max_workers: Jobs run at the same time
+        :param ttl: Seconds a finished job is kept
+        """
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, key, func, *args):
+        """
+        Queue func(job, *args), or join the in-flight job with the same kind and key.
+
+        :param kind: Job type
+        :param key: Hashable identity of the request, e.g. (company name, period)
+        :param func: Function doing the work; it receives the Job to report progress and returns the result
+        :param args: Further arguments of func
+        :return: The Job, and True if the submission was merged into an existing job.
+        """
+        with self._lock:
+            self._expire()
+            job = self._in_flight.get((kind, key))
+            if job is not None:
+                job.requests += 1
+                logger.info(f"Merged {kind} request into in-flight job {job.id} ({job.requests} requests).")
+                return job, True
+
+            job = Job(kind, key)
+            self._jobs[job.id] = job
+            self._in_flight[(kind, key)] = job
+
+        logger.info(f"Queued {kind} job {job.id}.")
+        self._executor.submit(self._run, job, func, args)
+        return job, False
+
+    def _run(self, job, func, args):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            result = func(job, *args)
+        except Exception as e:
+            logger.error(f"{job.kind} job {job.id} failed: {e}", exc_info=True)
+            result, error, status = None, str(e), FAILED
+        else:
+            error, status = None, SUCCEEDED
+
+        # Finish the job in one step under the lock, so that pollers and _expire never see
+        # a done job without its finish time
+        with self._lock:
+            job.result, job.error = result, error
+            job.finished_at = time.time()
+            job.status = status
+            self._in_flight.pop((job.kind, job.key), None)
+        logger.info(f"{job.kind} job {job.id} {job.status} in {job.finished_at - job.started_at:.2f} seconds.")
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.done and job.finished_at is not None and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """
+        :return: The Job with this id, or None if it is unknown or expired.
+        """
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        """
+        :return: Dictionary with the number of jobs per status.
+        """
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """
+    :return: The process-wide job queue, created on first use.
+    """
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
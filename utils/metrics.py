@@ -0,0 +1,242 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.adaptive_concurrency import DEFAULT_LATENCY_BUCKETS, LatencyHistogram
+
+# Innermost active RequestTimings of the current context, see request_timings()
+_current_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class RequestTimings:
+    def __init__(self, parent=None):
+        """
+        Per-request summary of the timers observed while it is active: count, total and maximum seconds
+        per metric, over all label values. Observations are also passed on to the enclosing summary.
+
+        :param parent: Enclosing RequestTimings, if any
+        """
+        self.parent = parent
+        self.started_at = time.perf_counter()
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            count, total, maximum = self._timings.get(name, (0, 0.0, 0.0))
+            self._timings[name] = (count + 1, total + seconds, max(maximum, seconds))
+        if self.parent is not None:
+            self.parent.record(name, seconds)
+
+    def summary(self):
+        """
+        :return: JSON-serialisable dictionary with the elapsed seconds and, per metric, count, total and max seconds.
+        """
+        with self._lock:
+            timings = dict(self._timings)
+        return {
+            "elapsed_seconds": round(time.perf_counter() - self.started_at, 3),
+            "timers": {name: {"count": count, "total_seconds": round(total, 3), "max_seconds": round(maximum, 3)}
+                       for name, (count, total, maximum) in sorted(timings.items())},
+        }
+
+
+@contextmanager
+def request_timings():
+    """
+    Collect the timers observed in the current context (including asyncio tasks started from it and Gemini calls
+    made through the scheduler) into a RequestTimings.
+
+    :return: Context manager yielding the RequestTimings.
+    """
+    timings = RequestTimings(_current_timings.get())
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        """
+        Monotonic counter, one value per combination of label values.
+
+        :param name: Metric name, ending in '_total'
+        :param help_text: Description shown on /metrics
+        :param labelnames: Names of the labels
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple((name, labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in values)
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        Latency histogram in seconds, one LatencyHistogram per combination of label values.
+
+        Observations are also recorded in the active request_timings() summaries.
+
+        :param name: Metric name, ending in '_seconds'
+        :param help_text: Description shown on /metrics
+        :param labelnames: Names of the labels
+        :param buckets: Sorted upper bounds of the buckets in seconds, the last one should be inf
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple((name, labels.get(name, "")) for name in self.labelnames)
+
+    def observe(self, seconds, **labels):
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.record(self.name, seconds)
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observe the duration of the `with` block, whether or not it raises.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def timed(self, **labels):
+        """
+        :return: Decorator observing the duration of each call of a function or coroutine function.
+        """
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.time(**labels):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def render(self):
+        with self._lock:
+            histograms = [(key, list(h.counts), h.count, h.sum) for key, h in sorted(self._histograms.items())]
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, counts, count, total in histograms:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Process-wide set of counters and histograms, rendered in the Prometheus text format by /metrics.
+        Metrics are registered once, at import time of the module they instrument.
+        """
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name, help_text, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, metric_class) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with another type or labels.")
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        """
+        :return: The counter with this name, registered on first use.
+        """
+        return self._register(Counter, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        :return: The histogram with this name, registered on first use.
+        """
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self):
+        """
+        :return: All metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for _, metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    :return: The process-wide metrics registry, created on first use.
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry()
+        return _metrics
@@ -0,0 +1,223 @@
+import asyncio
+import atexit
+import logging
+import threading
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from utils.playwright_redirectCapture import RedirectCapture
+from utils.adaptive_concurrency import AIMDConcurrencyController
+
+logger = logging.getLogger(__name__)
+
+# Process-wide defaults for the shared pool
+NUM_BROWSERS = 1
+MAX_OPEN_PAGES = 40
+INITIAL_CONCURRENCY = 10
+MAX_NAVIGATIONS_PER_PAGE = 50
+
+
+class _PooledPage:
+    def __init__(self, browser_index, page, capture):
+        self.browser_index = browser_index
+        self.page = page
+        self.capture = capture
+        self.navigations = 0
+        self.crashed = False
+        page.on("crash", self._on_crash)
+
+    def _on_crash(self, _page):
+        self.crashed = True
+
+    def is_healthy(self, max_navigations):
+        return not self.crashed and not self.page.is_closed() and self.navigations < max_navigations
+
+
+class BrowserPool:
+    def __init__(self, num_browsers=NUM_BROWSERS, max_pages=MAX_OPEN_PAGES, max_navigations_per_page=MAX_NAVIGATIONS_PER_PAGE,
+                 initial_concurrency=INITIAL_CONCURRENCY):
+        """
+        Long-lived, process-wide pool of warm Chromium browsers and pages for link resolution.
+
+        Playwright objects are bound to the event loop that created them, while every Flask request
+        runs its own `asyncio.run`. The pool therefore owns a dedicated event loop in a daemon thread,
+        and callers on any loop submit work to it with `resolve()`.
+
+        Pages are opened lazily up to a global cap, health-checked before reuse and recycled after
+        `max_navigations_per_page` navigations or after a crash. Disconnected browsers are relaunched.
+
+        The number of concurrent navigations is governed by an AIMD controller: it grows while per-link
+        latency and the error rate stay healthy and backs off on navigation timeouts, Google throttling
+        and errors, never exceeding `max_pages`. A link that commits but never redirects within
+        `max_wait` is recorded as 'no_redirect' and does not shrink the limit.
+
+        :param num_browsers: Number of Chromium instances to spread pages over
+        :param max_pages: Global cap on open pages across all browsers and requests
+        :param max_navigations_per_page: Navigations after which a page is closed and replaced
+        :param initial_concurrency: Starting concurrency limit of the AIMD controller
+        """
+        self.num_browsers = num_browsers
+        self.max_pages = max_pages
+        self.max_navigations_per_page = max_navigations_per_page
+        self.controller = AIMDConcurrencyController(initial_limit=initial_concurrency, max_limit=max_pages)
+
+        self._loop = None
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+        # Only touched from the pool loop
+        self._playwright = None
+        self._browsers = [None] * num_browsers
+        self._contexts = [None] * num_browsers
+        self._idle_pages = []
+        self._open_pages = 0
+        self._next_browser = 0
+        self._launch_lock = None
+
+    def _ensure_loop(self):
+        with self._thread_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+                self._thread.start()
+        return self._loop
+
+    async def _get_context(self, index):
+        async with self._launch_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            browser = self._browsers[index]
+            if browser is None or not browser.is_connected():
+                logger.info(f"Launching pooled browser {index}")
+                browser = await self._playwright.chromium.launch(headless=True)
+                self._browsers[index] = browser
+                self._contexts[index] = await browser.new_context()
+            return self._contexts[index]
+
+    async def _new_page(self):
+        index = self._next_browser
+        self._next_browser = (self._next_browser + 1) % self.num_browsers
+
+        context = await self._get_context(index)
+        page = await context.new_page()
+        capture = RedirectCapture(page)
+        await capture.install()
+        self._open_pages += 1
+        return _PooledPage(index, page, capture)
+
+    async def _discard_page(self, pooled):
+        self._open_pages -= 1
+        try:
+            await pooled.page.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled page: {e}")
+
+    async def _acquire_page(self):
+        while self._idle_pages:
+            pooled = self._idle_pages.pop()
+            browser = self._browsers[pooled.browser_index]
+            if pooled.is_healthy(self.max_navigations_per_page) and browser is not None and browser.is_connected():
+                return pooled
+            await self._discard_page(pooled)
+        return await self._new_page()
+
+    async def _resolve(self, link, timeout, max_wait):
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+
+        await self.controller.acquire()
+        start_time = self._loop.time()
+        outcome = "error"
+        try:
+            pooled = await self._acquire_page()
+            try:
+                pooled.navigations += 1
+                resolved_link = await pooled.capture.resolve(link, timeout, max_wait)
+                if pooled.capture.throttled:
+                    outcome = "throttled"
+                else:
+                    outcome = "ok" if resolved_link else "no_redirect"
+                return resolved_link
+            except Exception as e:
+                if isinstance(e, PlaywrightTimeoutError):
+                    outcome = "timeout"
+                # Do not hand a page in an unknown state to the next caller
+                pooled.crashed = True
+                raise
+            finally:
+                if pooled.is_healthy(self.max_navigations_per_page):
+                    self._idle_pages.append(pooled)
+                else:
+                    await self._discard_page(pooled)
+        finally:
+            self.controller.record(self._loop.time() - start_time, outcome)
+            self.controller.release()
+
+    async def resolve(self, link, timeout, max_wait):
+        """
+        Resolve a Google News link on a pooled page. Safe to call from any event loop.
+
+        :param link: Google News link to resolve
+        :param timeout: Timeout for the Google News page to commit, in milliseconds
+        :param max_wait: Maximum wait for the redirect after the page has committed, in seconds
+        :return: Resolved original link or None if no redirect was seen in time
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._resolve(link, timeout, max_wait), loop)
+        return await asyncio.wrap_future(future)
+
+    def stats(self):
+        """
+        :return: Dictionary with the number of open and idle pages and the concurrency controller state.
+        """
+        return {
+            "open_pages": self._open_pages,
+            "idle_pages": len(self._idle_pages),
+            "max_pages": self.max_pages,
+            "concurrency": self.controller.stats(),
+        }
+
+    async def _close(self):
+        for pooled in self._idle_pages:
+            await self._discard_page(pooled)
+        self._idle_pages = []
+        for browser in self._browsers:
+            if browser is not None and browser.is_connected():
+                await browser.close()
+        self._browsers = [None] * self.num_browsers
+        self._contexts = [None] * self.num_browsers
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        self._open_pages = 0
+        self._launch_lock = None
+
+    def shutdown(self, timeout=10):
+        """
+        Close all browsers and stop the pool loop.
+        """
+        with self._thread_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Error shutting down browser pool: {e}")
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """
+    :return: The process-wide BrowserPool shared by all requests, created on first use.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = BrowserPool()
+            atexit.register(_shared_pool.shutdown)
+        return _shared_pool
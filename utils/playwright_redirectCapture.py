@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import re
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Resource types never needed to learn the redirect target
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet", "texttrack", "manifest", "eventsource", "websocket"}
+
+# Hosts that belong to the Google News redirect flow (news, consent, static assets, APIs)
+_GOOGLE_HOST_RE = re.compile(r"(^|\.)(google\.[a-z.]+|gstatic\.com|googleapis\.com|googleusercontent\.com)$")
+_SORRY_PAGE_RE = re.compile(r"^https?://[^/]*google\.[a-z.]+/sorry/")
+
+
+def is_google_url(url):
+    """
+    :param url: URL to check
+    :return: True if the URL is served by Google (and so is not a publisher redirect target).
+    """
+    host = urlparse(url).hostname or ""
+    return bool(_GOOGLE_HOST_RE.search(host))
+
+
+def is_redirect_target(url):
+    """
+    :param url: URL of a document request
+    :return: True if the URL is a publisher page, i.e. the end of the Google News redirect.
+    """
+    return url.startswith(("http://", "https://")) and not is_google_url(url)
+
+
+class RedirectCapture:
+    def __init__(self, page):
+        """
+        Detect the Google News redirect target of a page through request events instead of URL polling.
+
+        Call install() once per page; the page can then be reused for any number of resolve() calls.
+        The publisher document request is aborted as soon as it is seen, so the publisher page is
+        never rendered. Images, fonts, media, stylesheets and third-party scripts are aborted too.
+
+        :param page: Playwright page
+        """
+        self.page = page
+        self.throttled = False  # Whether the last resolve() hit Google rate limiting
+        self._pending = None
+
+    async def install(self):
+        """
+        Register request routing and the request listener on the page.
+        """
+        await self.page.route("**/*", self._route)
+        # Server-side redirects skip the route handler, but still emit request events
+        self.page.on("request", self._on_request)
+
+    def _capture(self, url):
+        if self._pending is not None and not self._pending.done():
+            self._pending.set_result(url)
+
+    def _is_target_navigation(self, request):
+        return (request.is_navigation_request()
+                and request.frame == self.page.main_frame
+                and is_redirect_target(request.url))
+
+    def _on_request(self, request):
+        if self._is_target_navigation(request):
+            self._capture(request.url)
+        elif request.is_navigation_request() and _SORRY_PAGE_RE.search(request.url):
+            # Google redirects rate-limited clients to its /sorry/ captcha page
+            self.throttled = True
+            self._capture(None)
+
+    async def _route(self, route):
+        request = route.request
+        try:
+            if self._is_target_navigation(request):
+                self._capture(request.url)
+                await route.abort()
+            elif request.resource_type in BLOCKED_RESOURCE_TYPES:
+                await route.abort()
+            elif request.resource_type == "script" and not is_google_url(request.url):
+                await route.abort()
+            else:
+                await route.continue_()
+        except Exception as e:
+            # The page may have navigated away while the request was in flight
+            logger.debug(f"Routing failed for {request.url}: {e}")
+
+    async def resolve(self, link, timeout, max_wait):
+        """
+        Navigate to a Google News link and return the publisher URL as soon as its request is seen.
+
+        :param link: Google News link to resolve
+        :param timeout: Timeout for the Google News page to commit, in milliseconds
+        :param max_wait: Maximum wait for the redirect after the page has committed, in seconds
+        :return: Resolved original link or None if no redirect was seen in time (or the request was throttled)
+        """
+        loop = asyncio.get_running_loop()
+        self.throttled = False
+        self._pending = loop.create_future()
+        navigation = asyncio.ensure_future(self.page.goto(link, timeout=timeout, wait_until="commit"))
+
+        try:
+            await asyncio.wait({navigation, self._pending}, return_when=asyncio.FIRST_COMPLETED)
+            if not self._pending.done():
+                response = navigation.result()  # Propagate navigation errors
+                if response is not None and response.status == 429:
+                    self.throttled = True
+                    return None
+                await asyncio.wait_for(asyncio.shield(self._pending), timeout=max_wait)
+            return self._pending.result()
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._pending = None
+            # The page is reused as is: a pending navigation is simply superseded by the next goto
+            if not navigation.done():
+                navigation.cancel()
+            await asyncio.gather(navigation, return_exceptions=True)
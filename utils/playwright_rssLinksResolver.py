@@ -3,6 +3,7 @@ from playwright.async_api import async_playwright
 import logging
 import time
 import pandas as pd
+from utils.playwright_redirectCapture import RedirectCapture
 
 class GoogleNewsLinkResolver:
     def __init__(self, max_concurrent_tasks=10, timeout=30, max_wait=30):
@@ -31,17 +32,11 @@ class GoogleNewsLinkResolver:
             async with async_playwright() as p:
                 browser = await p.chromium.launch(headless=True)
                 page = await browser.new_page()
-                await page.goto(link, timeout=self.timeout)
-                
-                redirected_url = page.url
-                start_time = asyncio.get_event_loop().time()
-                
-                while redirected_url.startswith('https://news.google.com'):
-                    await asyncio.sleep(0.1)
-                    redirected_url = page.url
-                    
-                    if asyncio.get_event_loop().time() - start_time > self.max_wait:
-                        break
+                capture = RedirectCapture(page)
+                await capture.install()
+
+                # Completes as soon as the publisher request is seen, without rendering it
+                redirected_url = await capture.resolve(link, self.timeout, self.max_wait)
                 self.logger.info(f"Resolved link: {redirected_url}")
                 return redirected_url
         except Exception as e:
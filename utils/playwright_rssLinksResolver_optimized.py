@@ -1,51 +1,152 @@
 import pandas as pd
-from playwright.async_api import async_playwright
 import asyncio
 import logging
+import aiohttp
+from utils.sqlite_cache import SQLiteCache
+from utils.gnews_url_decoder import GoogleNewsURLDecoder
+from utils.playwright_browserPool import get_browser_pool
+from utils.metrics import get_metrics
+
+LINK_RESOLVE_SECONDS = get_metrics().histogram("link_resolve_seconds", "Duration of resolving one Google News link.",
+                                               ["method"])
+LINK_RESOLVE_FAILURES = get_metrics().counter("link_resolve_failures_total", "Google News links that could not be resolved.")
+RESOLVED_LINK_CACHE = get_metrics().counter("resolved_link_cache_total", "Resolved link cache lookups.", ["result"])
+
+class ResolvedLinkCache:
+    def __init__(self, resolved_ttl=30 * 24 * 3600, failed_ttl=3600):
+        """
+        On-disk cache of RSS link -> resolved link.
+
+        Failed resolutions are cached as None with a much shorter TTL, so that links Google
+        refuses to redirect are not retried on every request but transient failures heal quickly.
+
+        :param resolved_ttl: Time to live of resolved links in seconds
+        :param failed_ttl: Time to live of negative (None) results in seconds
+        """
+        self.resolved_ttl = resolved_ttl
+        self.failed_ttl = failed_ttl
+        self._store = SQLiteCache("resolved_links.sqlite3", "resolved_links")
+
+    def get_many(self, links):
+        """
+        :param links: List of Google News links
+        :return: Dictionary of rss links: resolved links (None for cached failures) for fresh hits only
+        """
+        return self._store.get_many(links)
+
+    def set_many(self, results):
+        """
+        :param results: Dictionary of rss links: resolved links (None for failures)
+        """
+        self._store.set_many({link: resolved for link, resolved in results.items() if resolved is not None}, self.resolved_ttl)
+        self._store.set_many({link: None for link, resolved in results.items() if resolved is None}, self.failed_ttl)
 
 class GoogleNewsLinkResolverOptimized:
-    def __init__(self, max_pages=20, timeout=20, max_wait=5):
+    def __init__(self, max_pages=20, timeout=20, max_wait=5, use_cache=True, use_fast_decoder=True, browser_pool=None):
         """
         Initialize the link resolver with configurable parameters.
 
-        :param max_pages: Maximum number of concurrent browser pages
+        Browser navigation runs on a long-lived BrowserPool shared by all resolvers in the process,
+        so no browser is launched or torn down per call.
+
+        :param max_pages: Upper bound on pooled pages this resolver uses concurrently (the worker pool is
+            sized to min(number of links, max_pages))
         :param timeout: Page load timeout in seconds
         :param max_wait: Maximum wait time for redirection in seconds
+        :param use_cache: Consult the on-disk ResolvedLinkCache and only navigate cache misses
+        :param use_fast_decoder: Try browser-free decoding first and only navigate links it cannot handle
+        :param browser_pool: BrowserPool to navigate with, defaults to the process-wide shared pool
         """
         self.max_pages = max_pages
         self.timeout = timeout * 1000  # Convert to milliseconds for Playwright
         self.max_wait = max_wait
+        self.cache = ResolvedLinkCache() if use_cache else None
+        self.decoder = GoogleNewsURLDecoder() if use_fast_decoder else None
+        self.browser_pool = browser_pool or get_browser_pool()
+        self._http_session = None
+        self._page_slots = asyncio.Semaphore(max_pages)
         self.logger = logging.getLogger(__name__)
         logging.basicConfig(level=logging.INFO)
 
-    async def _fetch_links(self, page, queue, results):
+    @LINK_RESOLVE_SECONDS.timed(method="browser")
+    async def _resolve_in_browser(self, link):
+        """
+        Resolve a single Google News link on a page of the shared browser pool.
+
+        :param link: Google News link to resolve
+        :return: Resolved original link or None if failed
+        """
+        try:
+            async with self._page_slots:
+                resolved_link = await self.browser_pool.resolve(link, self.timeout, self.max_wait)
+            self.logger.info(f"Resolved: {resolved_link}")
+            if resolved_link is None:
+                LINK_RESOLVE_FAILURES.inc()
+            return resolved_link  # None if no redirect was seen in time
+        except Exception as e:
+            self.logger.error(f"Error resolving link: {e}")
+            LINK_RESOLVE_FAILURES.inc()
+            return None  # Mark as unresolved
+
+    async def _fetch_links(self, queue, results):
         while True:
             link = await queue.get()
             if link is None:  # Exit signal
                 break
 
             try:
-                await page.goto(link, timeout=self.timeout)
-                start_time = asyncio.get_event_loop().time()
-
-                # Wait until the URL does not start with 'https://news.google.com'
-                while page.url.startswith("https://news.google.com"):
-                    await page.wait_for_timeout(100)  # Wait for 0.1 second before checking again
-                    if asyncio.get_event_loop().time() - start_time > self.max_wait:
-                        break
-
-                resolved_link = page.url
-                if not resolved_link.startswith("https://news.google.com"):
-                    results[link] = resolved_link  # Save the resolved link
-                else:
-                    results[link] = None  # Mark as unresolved if it still redirects
-                self.logger.info(f"Resolved: {resolved_link}")
-            except Exception as e:
-                self.logger.error(f"Error resolving link: {e}")
-                results[link] = None  # Mark as unresolved
+                results[link] = await self._resolve_in_browser(link)
             finally:
                 queue.task_done()
 
+    def _get_http_session(self):
+        if self._http_session is None:
+            self._http_session = aiohttp.ClientSession()
+        return self._http_session
+
+    async def close(self):
+        """
+        Close the fast decoder session. The shared browser pool stays warm for the next request.
+        """
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def resolve_link(self, link):
+        """
+        Resolve a single link: cache, then browser-free decoding, then the shared browser pool.
+
+        Intended for streaming use, e.g. `async with resolver: await resolver.resolve_link(link)`.
+
+        :param link: Google News link to resolve
+        :return: Resolved original link or None if failed
+        """
+        if self.cache:
+            cached = await asyncio.to_thread(self.cache.get_many, [link])
+            RESOLVED_LINK_CACHE.inc(result="hit" if link in cached else "miss")
+            if link in cached:
+                return cached[link]
+
+        resolved_link = None
+        if self.decoder:
+            with LINK_RESOLVE_SECONDS.time(method="decoder"):
+                resolved_link = await self.decoder.decode(self._get_http_session(), link)
+        if resolved_link:
+            if self.cache:
+                await asyncio.to_thread(self.cache.set_many, {link: resolved_link})
+            return resolved_link
+
+        resolved_link = await self._resolve_in_browser(link)
+        if self.cache:
+            await asyncio.to_thread(self.cache.set_many, {link: resolved_link})
+        return resolved_link
+
     async def resolve_links(self, links):
         """
         Resolve multiple links concurrently.
@@ -56,18 +157,35 @@ class GoogleNewsLinkResolverOptimized:
         results = {}
         queue = asyncio.Queue()
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context()
-
-            # Create a pool of pages (max_pages pages)
-            pages = [await context.new_page() for _ in range(self.max_pages)]
-
-            # Start worker tasks for each page
-            workers = [asyncio.create_task(self._fetch_links(page, queue, results)) for page in pages]
+        # Only cache misses are sent to the page pool
+        cached = await asyncio.to_thread(self.cache.get_many, links) if self.cache else {}
+        misses = [link for link in dict.fromkeys(links) if link not in cached]
+        RESOLVED_LINK_CACHE.inc(len(cached), result="hit")
+        RESOLVED_LINK_CACHE.inc(len(misses), result="miss")
+        self.logger.info(f"Resolved link cache: {len(cached)} hits, {len(misses)} misses")
+        if not misses:
+            return cached
+
+        async with self:
+            # Browser-free tier first; only what it cannot handle goes to Chromium
+            if self.decoder:
+                decoded = await self.decoder.decode_links(self._get_http_session(), misses)
+                decoded = {link: url for link, url in decoded.items() if url}
+                self.logger.info(f"Decoded {len(decoded)} of {len(misses)} links without a browser")
+                if self.cache:
+                    await asyncio.to_thread(self.cache.set_many, decoded)
+                cached = {**cached, **decoded}
+                misses = [link for link in misses if link not in decoded]
+                if not misses:
+                    return cached
+
+            # Start worker tasks, no more than there are links to resolve; the shared pool's
+            # adaptive controller decides how many of them navigate at the same time
+            num_workers = min(len(misses), self.max_pages)
+            workers = [asyncio.create_task(self._fetch_links(queue, results)) for _ in range(num_workers)]
 
             # Add links to the queue
-            for link in links:
+            for link in misses:
                 await queue.put(link)
 
             start_time = asyncio.get_event_loop().time()
@@ -75,7 +193,7 @@ class GoogleNewsLinkResolverOptimized:
             await queue.join()
 
             # Stop workers
-            for _ in range(self.max_pages):
+            for _ in range(num_workers):
                 await queue.put(None)  # Send exit signal to workers
 
             await asyncio.gather(*workers)  # Ensure all workers finish
@@ -85,11 +203,11 @@ class GoogleNewsLinkResolverOptimized:
 
             failed_count = sum(1 for link, resolved_link in results.items() if resolved_link is None)
             self.logger.info(f"Total number of failed links: {failed_count}")
+            self.logger.info(f"Browser pool stats: {self.browser_pool.stats()}")
 
-            await context.close()
-            await browser.close()
-
-        return results
+        if self.cache:
+            await asyncio.to_thread(self.cache.set_many, results)
+        return {**cached, **results}
 
     def resolve_links_sync(self, links):
         """
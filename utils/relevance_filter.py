@@ -0,0 +1,108 @@
+import logging
+import re
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Trailing words dropped from a company name to get the name used in news copy
+LEGAL_SUFFIXES = {"ltd", "limited", "inc", "incorporated", "corp", "corporation", "plc", "pvt", "private", "llc", "co", "company"}
+
+# Trailing words that news copy often leaves out ("Adani Green Energy" -> "Adani Green")
+GENERIC_NAME_WORDS = {"energy", "industries", "enterprises", "holdings", "group", "services", "technologies",
+                      "technology", "solutions", "international", "india", "global", "ventures"}
+
+# Words indicating that an article is about a business rather than a homonym (a galaxy, a place, a person)
+BUSINESS_TERMS = {
+    "acquisition", "acquire", "analyst", "analysts", "board", "bse", "ceo", "cfo", "chairman", "client", "clients",
+    "contract", "crore", "customers", "deal", "debt", "director", "directors", "dividend", "earnings", "ebitda",
+    "fiscal", "fy", "investor", "investors", "ipo", "lakh", "listed", "loan", "margin", "merger", "nifty", "nse",
+    "order", "orders", "profit", "promoter", "promoters", "quarter", "quarterly", "rating", "revenue", "sebi",
+    "sensex", "share", "shareholders", "shares", "stake", "stock", "stocks", "subsidiary", "turnover", "valuation",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def company_aliases(company_name, extra_aliases=()):
+    """
+    :param company_name: Company name as entered by the user, e.g. 'Adani Green Energy Ltd'
+    :param extra_aliases: Additional names or tickers to match
+    :return: Sorted list of lower-case aliases, longest first.
+    """
+    words = company_name.split()
+    aliases = {company_name}
+    while len(words) > 1 and words[-1].lower().strip(".,") in LEGAL_SUFFIXES:
+        words = words[:-1]
+        aliases.add(" ".join(words))
+    if len(words) > 2 and words[-1].lower() in GENERIC_NAME_WORDS:
+        aliases.add(" ".join(words[:-1]))
+    aliases.update(extra_aliases)
+    return sorted({alias.lower().strip() for alias in aliases if alias.strip()}, key=len, reverse=True)
+
+
+class RelevanceFilter:
+    def __init__(self, company_name, extra_aliases=(), min_mentions=1, min_business_terms=1):
+        """
+        Cheap local check of whether an article concerns the company, run before paying for a Gemini call.
+
+        An article is relevant when the company (or an alias) is named in its title or content at least
+        `min_mentions` times and, unless the name appears with a legal suffix ('... Ltd') or a stock exchange
+        tag, the text uses at least `min_business_terms` distinct business words. The second condition
+        filters out homonyms, e.g. astronomy articles about the Magellanic Clouds. The default of one business
+        word keeps the filter cautious, since a wrongly skipped article is never scored at all.
+
+        :param company_name: Name of the company
+        :param extra_aliases: Additional names or tickers to match
+        :param min_mentions: Minimum number of alias mentions in title and content
+        :param min_business_terms: Minimum number of distinct BUSINESS_TERMS in title and content
+        """
+        self.company_name = company_name
+        self.aliases = company_aliases(company_name, extra_aliases)
+        self.min_mentions = min_mentions
+        self.min_business_terms = min_business_terms
+
+        alias_pattern = "|".join(re.escape(alias) for alias in self.aliases)
+        self._alias_re = re.compile(rf"(?<![a-z0-9])(?:{alias_pattern})(?![a-z0-9])")
+        suffixes = "|".join(sorted(LEGAL_SUFFIXES))
+        self._strong_re = re.compile(rf"(?<![a-z0-9])(?:{alias_pattern})(?:\s+(?:{suffixes})\b|\s*\((?:nse|bse|nasdaq|nyse)\b)")
+
+        self.checked = 0
+        self.skipped = 0
+
+    def score(self, title, content):
+        """
+        :param title: Article headline
+        :param content: Extracted article text
+        :return: Dictionary with the alias mention count, title match, strong match and business term count.
+        """
+        title = str(title or "").lower()
+        text = f"{title}\n{str(content or '').lower()}"
+        return {
+            "mentions": len(self._alias_re.findall(text)),
+            "in_title": bool(self._alias_re.search(title)),
+            "strong": bool(self._strong_re.search(text)),
+            "business_terms": len(BUSINESS_TERMS.intersection(_WORD_RE.findall(text))),
+        }
+
+    def is_relevant(self, article):
+        """
+        :param article: Article with 'Title' and 'Content'
+        :return: True if the article should be sent to Gemini.
+        """
+        score = self.score(article["Title"], article["Content"])
+        relevant = score["mentions"] >= self.min_mentions and (
+            score["strong"] or score["business_terms"] >= self.min_business_terms
+        )
+
+        self.checked += 1
+        if not relevant:
+            self.skipped += 1
+            logger.debug(f"Skipping off-topic article: {article['Title']} ({score})")
+        return relevant
+
+    def stats(self):
+        """
+        :return: Dictionary with the number of articles checked, skipped (Gemini calls saved) and passed.
+        """
+        return {"checked": self.checked, "skipped": self.skipped, "passed": self.checked - self.skipped}
@@ -0,0 +1,120 @@
+import ast
+import json
+import re
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+_Q_COLUMN_RE = re.compile(r"^Q\d+$")
+
+INVALID_Q_VALUE = "Invalid data format"
+
+
+def _load_q_string(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        pass
+    # Python-repr dicts ("{'categorical': 'Yes', ...}"), as written by str() of a result in older files
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def split_q_values(values):
+    """
+    Split question values into categorical and text arrays.
+
+    :param values: Sequence of dicts with 'categorical' and 'text' (as parsed from the Gemini response),
+        strings of such dicts (as read back from a file; JSON, or Python repr through the slower
+        literal_eval fallback) or missing values.
+    :return: Object arrays of categorical answers and texts ("N/A" where absent), and a boolean array
+        marking the values that could not be read.
+    """
+    values = np.asarray(values, dtype=object)
+    types = np.fromiter(map(type, values), dtype=object, count=len(values))
+    is_str = types == str
+
+    # Missing values read as N/A; anything else that is not an object is invalid
+    is_dict = types == dict
+    invalid = ~is_dict & ~is_str
+    if invalid.any():
+        invalid[invalid] = ~pd.isna(values[invalid])
+    if is_str.any():
+        values = values.copy()
+        strings = values[is_str]
+        values[is_str] = np.fromiter(map(_load_q_string, strings), dtype=object, count=len(strings))
+        is_dict[is_str] = [type(value) is dict for value in values[is_str]]
+        invalid[is_str] = ~is_dict[is_str]
+
+    objects = values
+    if not is_dict.all():
+        objects = values.copy()
+        objects[~is_dict] = [{}] * int((~is_dict).sum())
+    categorical = np.fromiter(map(dict.get, objects, repeat("categorical"), repeat("N/A")), dtype=object,
+                              count=len(objects))
+    text = np.fromiter(map(dict.get, objects, repeat("text"), repeat("N/A")), dtype=object, count=len(objects))
+    # JSON nulls read as N/A as well
+    categorical[np.equal(categorical, None)] = "N/A"
+    text[np.equal(text, None)] = "N/A"
+    return categorical, text, invalid
+
+
+def join_q_parts(categorical, text, invalid):
+    """
+    :return: Object array of readable answers: the categorical answer, followed by the text on a new line
+        unless the text is "N/A", or "Invalid data format" where the value could not be read.
+    """
+    has_text = text != "N/A"
+    try:
+        joined = categorical[has_text] + "\n" + text[has_text]
+    except TypeError:
+        # A non-string answer
+        categorical, text = categorical.astype(str).astype(object), text.astype(str).astype(object)
+        joined = categorical[has_text] + "\n" + text[has_text]
+    formatted = categorical.copy()
+    formatted[has_text] = joined
+    formatted[invalid] = INVALID_Q_VALUE
+    return formatted
+
+
+def format_q_value(value):
+    """
+    Format a single 'Q' value for readability.
+
+    :param value: Dict with 'categorical' and 'text', or its JSON string.
+    :return: Formatted string or "Invalid data format".
+    """
+    return join_q_parts(*split_q_values([value]))[0]
+
+
+def format_q_columns(results_df):
+    """
+    Format all 'Q' columns of an analysis results DataFrame with whole-column array operations.
+
+    For dict values (fresh Gemini results) this costs about the same as formatting cell by cell, as the
+    per-cell dict lookups dominate. String values (results read back from a file) are parsed with json.loads,
+    several times faster than the literal_eval used before, which is only tried when json.loads fails.
+
+    :param results_df: DataFrame of parsed Gemini results.
+    :return: DataFrame with readable 'Q' columns.
+    """
+    q_cols = [col for col in results_df.columns if _Q_COLUMN_RE.match(str(col))]
+    if not q_cols or results_df.empty:
+        return results_df
+
+    formatted = {col: join_q_parts(*split_q_values(results_df[col].to_numpy(dtype=object))) for col in q_cols}
+    return results_df.assign(**formatted)
+
+
+def format_result_record(result):
+    """
+    Format a single parsed Gemini result like a row of format_q_columns' output, e.g. to stream it.
+
+    :param result: Result dictionary.
+    :return: New dictionary with readable 'Q' values and without private ('_'-prefixed) fields.
+    """
+    return {key: format_q_value(value) if _Q_COLUMN_RE.match(key) else value
+            for key, value in result.items() if not key.startswith("_")}
@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Directory holding all on-disk caches, overridable through the environment
+CACHE_DIR = os.getenv("MGC_CACHE_DIR", "cache")
+
+# SQLite limits the number of bound parameters per statement
+_MAX_QUERY_PARAMS = 500
+
+
+class SQLiteCache:
+    def __init__(self, db_name, table):
+        """
+        A small persistent key/value store with per-entry expiry, backed by SQLite.
+
+        Values are stored as JSON so any JSON-serializable object (including None) can be cached.
+        A new connection is opened per operation, so one instance can be shared across threads
+        and event loops.
+
+        :param db_name: File name of the database inside CACHE_DIR
+        :param table: Table name used for this cache
+        """
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.db_path = os.path.join(CACHE_DIR, db_name)
+        self.table = table
+        self._write_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT, stored_at REAL, expires_at REAL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, keys, include_expired=False):
+        """
+        Look up several keys at once.
+
+        :param keys: Iterable of keys
+        :param include_expired: Also return entries whose TTL has passed
+        :return: Dictionary of key: value for every key found (misses are absent)
+        """
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found = {}
+
+        with self._connect() as conn:
+            for i in range(0, len(keys), _MAX_QUERY_PARAMS):
+                batch = keys[i:i + _MAX_QUERY_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, value, expires_at FROM {self.table} WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, value, expires_at in rows:
+                    if include_expired or expires_at is None or expires_at > now:
+                        found[key] = json.loads(value)
+
+        return found
+
+    def get(self, key, default=None, include_expired=False):
+        """
+        Look up a single key.
+
+        :return: The cached value, or `default` on a miss.
+        """
+        return self.get_many([key], include_expired).get(key, default)
+
+    def set_many(self, items, ttl=None):
+        """
+        Store several key/value pairs with the same TTL.
+
+        :param items: Dictionary of key: value
+        :param ttl: Time to live in seconds, or None to never expire
+        """
+        if not items:
+            return
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        rows = [(key, json.dumps(value), now, expires_at) for key, value in items.items()]
+
+        with self._write_lock, self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a single key/value pair.
+        """
+        self.set_many({key: value}, ttl)
+
+    def purge_expired(self):
+        """
+        Delete every expired entry.
+
+        :return: Number of deleted entries.
+        """
+        with self._write_lock, self._connect() as conn:
+            cursor = conn.execute(f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+            deleted = cursor.rowcount
+
+        logger.debug(f"Purged {deleted} expired entries from {self.db_path}:{self.table}")
+        return deleted
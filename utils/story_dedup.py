@@ -0,0 +1,232 @@
+import logging
+import re
+import zlib
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Headlines sharing at least this fraction of their words (Jaccard) are treated as the same story
+SIMILARITY_THRESHOLD = 0.5
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it", "its",
+    "of", "on", "or", "over", "says", "that", "the", "this", "to", "up", "was", "will", "with",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def headline_words(headline):
+    """
+    :param headline: Article headline, optionally with the Google News " - Publisher" suffix
+    :return: Set of significant lower-case words of the headline.
+    """
+    headline = str(headline)
+    if " - " in headline:
+        headline = headline.rsplit(" - ", 1)[0]
+    return {word for word in _WORD_RE.findall(headline.lower()) if word not in STOPWORDS and len(word) > 1}
+
+
+def jaccard(a, b):
+    """
+    :return: Jaccard similarity of two word sets.
+    """
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def cluster_headlines(headlines, threshold=SIMILARITY_THRESHOLD, groups=None):
+    """
+    Group headlines about the same story: two headlines are linked when their word overlap reaches the
+    threshold, and linked headlines (transitively) share a cluster.
+
+    :param headlines: List of headlines
+    :param threshold: Jaccard similarity needed to link two headlines
+    :param groups: Optional list of group keys aligned with the headlines; headlines with the same
+        (non-null) key are always linked, e.g. near-duplicate clusters
+    :return: List of cluster numbers (starting at 1, in order of first appearance) aligned with the headlines.
+    """
+    words = [headline_words(headline) for headline in headlines]
+    parent = list(range(len(headlines)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    if groups is not None:
+        first_of_group = {}
+        for i, group in enumerate(groups):
+            if not pd.isna(group):
+                parent[find(i)] = find(first_of_group.setdefault(group, i))
+
+    for i in range(len(words)):
+        for j in range(i):
+            if jaccard(words[i], words[j]) >= threshold:
+                parent[find(i)] = find(j)
+
+    cluster_ids = {}
+    return [cluster_ids.setdefault(find(i), len(cluster_ids) + 1) for i in range(len(headlines))]
+
+
+def assign_unique_ids(df, headline_col="headline", date_col="date", threshold=SIMILARITY_THRESHOLD, group_col=None):
+    """
+    Assign the same unique_id to articles of the same day that cover the same story, without an LLM call.
+
+    This replaces the unique_id the model used to assign through the per-date chat history.
+
+    :param df: DataFrame of articles or analysis results
+    :param headline_col: Column holding the headlines
+    :param date_col: Column holding the published dates; ids are numbered per date
+    :param threshold: Jaccard similarity needed to link two headlines
+    :param group_col: Optional column of group keys; rows of the same day with the same key always share an id
+    :return: The DataFrame with a 'unique_id' column.
+    """
+    if df.empty:
+        return df
+
+    unique_ids = pd.Series(0, index=df.index)
+    for _, group in df.groupby(date_col, sort=False):
+        groups = group[group_col].tolist() if group_col else None
+        unique_ids[group.index] = cluster_headlines(group[headline_col].tolist(), threshold, groups)
+
+    df["unique_id"] = unique_ids
+    logger.info(f"Assigned {df.groupby(date_col)['unique_id'].nunique().sum()} story ids to {len(df)} articles.")
+    return df
+
+
+# Near-duplicate detection (MinHash with LSH banding)
+NEAR_DUPLICATE_THRESHOLD = 0.6
+_MINHASH_PRIME = np.uint64(4294967311)  # Smallest prime above 2**32
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold=NEAR_DUPLICATE_THRESHOLD, num_perm=64, bands=16, shingle_size=5, max_words=400,
+                 max_day_gap=1, seed=1):
+        """
+        Incremental near-duplicate detector for articles (e.g. syndicated copies of one wire story).
+
+        Each article is reduced to a MinHash signature of the word shingles of its title and the start of its
+        content. Signatures are split into `bands` bands; articles sharing any band bucket are candidates, and
+        a candidate is accepted when the estimated Jaccard similarity reaches `threshold`. Lookups only touch
+        the matching buckets, so indexing n articles takes roughly linear time.
+
+        :param threshold: Estimated Jaccard similarity needed to treat two articles as copies
+        :param num_perm: Number of MinHash permutations (signature length)
+        :param bands: Number of LSH bands; num_perm must be a multiple of it
+        :param shingle_size: Words per shingle
+        :param max_words: Only the first max_words words of title and content are used
+        :param max_day_gap: Copies must be published at most this many days apart
+        :param seed: Seed of the hash permutations, fixed so results are reproducible
+        """
+        assert num_perm % bands == 0, "num_perm must be a multiple of bands"
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_words = max_words
+        self.max_day_gap = max_day_gap
+
+        rng = np.random.RandomState(seed)
+        # Coefficients below 2**32 keep every intermediate of signature() within uint64
+        self._a = rng.randint(1, 2**32 - 1, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2**32 - 1, size=num_perm, dtype=np.uint64)
+
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self._signatures = {}
+        self._dates = {}
+        self._representative = {}
+
+    def signature(self, title, content):
+        """
+        :return: MinHash signature (uint64 array) of the title and the start of the content.
+        """
+        words = _WORD_RE.findall(f"{title} {content or ''}".lower())[:self.max_words]
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+        hashes = np.array([zlib.crc32(shingle.encode("utf-8")) for shingle in shingles], dtype=np.uint64) % _MINHASH_PRIME
+        # (a * h + b) mod p for every permutation and shingle, then the minimum per permutation.
+        # h and a are both below 2**32, so a * h fits in uint64; it is reduced before adding b so the sum fits too
+        return ((np.outer(hashes, self._a) % _MINHASH_PRIME + self._b) % _MINHASH_PRIME).min(axis=0)
+
+    def add(self, key, title, content, published_date=None):
+        """
+        Index an article and return the key of the cluster representative it belongs to.
+
+        :param key: Unique key of the article, e.g. its resolved link
+        :param title: Article headline
+        :param content: Extracted article text
+        :param published_date: Published date, used to only match copies from nearby days
+        :return: Key of the representative: the earliest indexed article it duplicates, or the key itself.
+        """
+        if key in self._representative:
+            return self._representative[key]
+
+        signature = self.signature(title, content)
+        article_date = _parse_date(published_date)
+        band_keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+        candidates = {self._representative[other] for band, band_key in enumerate(band_keys)
+                      for other in self._buckets[band].get(band_key, ())}
+        representative = key
+        for candidate in sorted(candidates, key=lambda other: (self._dates.get(other) or date.min, str(other))):
+            candidate_date = self._dates[candidate]
+            if article_date and candidate_date and abs((article_date - candidate_date).days) > self.max_day_gap:
+                continue
+            if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                representative = candidate
+                break
+
+        self._signatures[key] = signature
+        self._dates[key] = article_date
+        self._representative[key] = representative
+        for band, band_key in enumerate(band_keys):
+            self._buckets[band][band_key].append(key)
+        return representative
+
+    def stats(self):
+        """
+        :return: Dictionary with the number of indexed articles and of distinct clusters.
+        """
+        return {"articles": len(self._representative), "clusters": len(set(self._representative.values()))}
+
+
+def split_near_duplicates(df, index=None):
+    """
+    Split articles into cluster representatives and near-duplicate members, keyed by 'ResolvedLink'.
+
+    :param df: DataFrame of articles with 'Title', 'Content', 'Published_Date' and 'ResolvedLink'
+    :param index: NearDuplicateIndex to use, a new one by default
+    :return: DataFrame of representatives, and a list of (member article, representative link) tuples.
+    """
+    index = index or NearDuplicateIndex()
+    seen_links = set()
+    keep = []
+    members = []
+    for article in df.to_dict("records"):
+        link = article["ResolvedLink"]
+        representative = index.add(link, article["Title"], article["Content"], article["Published_Date"])
+        if representative != link or link in seen_links:
+            members.append((article, representative))
+            keep.append(False)
+        else:
+            seen_links.add(link)
+            keep.append(True)
+
+    logger.info(f"Near-duplicates: {len(members)} of {len(df)} articles reuse the analysis of another copy.")
+    return df[pd.Series(keep, index=df.index, dtype=bool)], members
@@ -0,0 +1,525 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, nullcontext
+from functools import partial
+
+import pandas as pd
+
+from utils.gnews_scraper import iter_news_RSS_links
+from utils.playwright_rssLinksResolver_optimized import GoogleNewsLinkResolverOptimized
+from utils.articleContentExtractor import extract_content_with_fallback
+from utils.http_fetcher import create_session
+from utils.gemini_analyser_async import (process_article, process_batch, format_q_columns, analysis_mode, AnalysisCache,
+                                         get_analysis_cache, cached_analysis, add_article_fields, default_result,
+                                         INPUT_PRICING, OUTPUT_PRICING, BATCH_TOKEN_BUDGET)
+from utils.result_formatting import format_result_record
+from utils.metrics import request_timings
+from utils.story_dedup import assign_unique_ids, NearDuplicateIndex
+from utils.content_budget import ContentBudget, CONTENT_TOKEN_BUDGET
+from utils.gemini_model import (model_config, batch_model_config, initiate_model, start_history, prompt_fingerprint,
+                                format_article, estimate_tokens)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Sentinel passed down a stage queue once its upstream is exhausted
+_STOP = object()
+
+# Seconds a batching-mode batch waits for more articles of its day before it is sent anyway
+BATCH_WAIT = 2.0
+
+
+class _Batch:
+    def __init__(self):
+        self.articles = []
+        self.futures = []
+        self.tokens = 0
+        self.full = asyncio.Event()
+
+
+class DateBatcher:
+    def __init__(self, send, batch_size, token_budget=BATCH_TOKEN_BUDGET, max_wait=BATCH_WAIT, capacity=None):
+        """
+        Group streamed articles of the same published date into batches for one Gemini request each,
+        with the same bounds as make_batches.
+
+        The first article of a batch leads it: it waits until the batch holds batch_size articles, the next
+        article would exceed the token budget, or max_wait seconds have passed, then sends the batch and hands
+        the other articles their results. Open batches are sent at once when no more articles can join them:
+        when `capacity` articles are waiting, or after flush() at the end of the stream.
+
+        :param send: Coroutine function analysing a list of articles of one date, returning their results in order
+        :param batch_size: Maximum articles per batch
+        :param token_budget: Maximum estimated input tokens per batch
+        :param max_wait: Seconds a batch waits for more articles before it is sent
+        :param capacity: Number of callers; once they all wait in open batches, those are sent
+        """
+        self.send = send
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+        self.max_wait = max_wait
+        self.capacity = capacity
+        self._open = {}  # Published date -> batch still taking articles
+        self._waiting = 0  # Articles in open batches
+
+    def _close(self, curr_date, batch):
+        batch.full.set()
+        if self._open.get(curr_date) is batch:
+            del self._open[curr_date]
+            self._waiting -= len(batch.articles)
+
+    def flush(self):
+        """
+        Send all open batches without waiting for more articles.
+        """
+        for curr_date, batch in list(self._open.items()):
+            self._close(curr_date, batch)
+
+    async def analyse(self, article):
+        """
+        :return: The article's result, or None if it is missing from the batch response.
+        """
+        curr_date = article["Published_Date"]
+        tokens = estimate_tokens(format_article(article["Title"], article["Content"]))
+        batch = self._open.get(curr_date)
+        if batch is not None and batch.tokens + tokens > self.token_budget:
+            self._close(curr_date, batch)
+            batch = None
+
+        leader = batch is None
+        if leader:
+            batch = self._open[curr_date] = _Batch()
+        future = asyncio.get_running_loop().create_future()
+        batch.articles.append(article)
+        batch.futures.append(future)
+        batch.tokens += tokens
+        self._waiting += 1
+        if len(batch.articles) >= self.batch_size:
+            self._close(curr_date, batch)
+        if self.capacity is not None and self._waiting >= self.capacity:
+            self.flush()
+
+        if not leader:
+            return await future
+
+        try:
+            try:
+                await asyncio.wait_for(batch.full.wait(), self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+            self._close(curr_date, batch)
+            results = await self.send(batch.articles)
+        except BaseException as e:
+            for follower in batch.futures[1:]:
+                if follower.done():
+                    continue
+                if isinstance(e, Exception):
+                    follower.set_exception(e)
+                else:
+                    follower.cancel()
+            raise
+
+        for follower, result in zip(batch.futures[1:], results[1:]):
+            if not follower.done():
+                follower.set_result(result)
+        return results[0]
+
+
+class ScrapeScorePipeline:
+    def __init__(self, company_name, period, max_results=100, resolve_workers=20,
+                 extract_workers=50, analyse_workers=10, queue_size=100, stateless=False,
+                 use_cache=True, relevance_filter=None, max_content_tokens=CONTENT_TOKEN_BUDGET,
+                 near_duplicates=True, on_event=None, shared=None, batch_size=1, token_budget=BATCH_TOKEN_BUDGET):
+        """
+        Stream articles through RSS -> resolve -> extract -> analyse stages connected by bounded queues.
+
+        Each article moves to the next stage as soon as it is ready, so the stages overlap and
+        the end-to-end latency is roughly that of the slowest stage rather than the sum of all four.
+
+        :param company_name: Name of the company to scrape and score
+        :param period: Period string, e.g. '7d' or '365d'
+        :param max_results: Maximum Google News results per interval
+        :param resolve_workers: Concurrent browser pages resolving RSS links
+        :param extract_workers: Concurrent article content downloads
+        :param analyse_workers: Concurrent Gemini analysis requests
+        :param queue_size: Capacity of each inter-stage queue (backpressure bound)
+        :param stateless: Analyse each article without the per-date chat history. Articles of the same day
+            are then analysed concurrently, and unique_id is assigned afterwards from the headlines.
+        :param use_cache: Reuse analyses of identical articles scored before with the same prompt and schema.
+            A cached analysis was not part of this run's chat history, so in chat history mode a run with cache
+            hits has its unique_ids assigned afterwards from the headlines, as in stateless mode
+        :param relevance_filter: RelevanceFilter; articles it rejects get the default neutral result without a Gemini call
+        :param max_content_tokens: Estimated token budget of each article's content (see ContentBudget); None disables trimming
+        :param near_duplicates: Analyse only the first article of each cluster of near-duplicates (e.g. syndicated
+            copies of a wire story); later copies wait for it and reuse its result and unique_id. In chat history
+            mode unique_id is numbered per date, so only copies published on the representative's date are matched
+        :param on_event: Optional callback receiving progress and result events as they happen (see iter_events).
+            It is called from the pipeline's event loop and must not block.
+        :param shared: SharedFetches of a batch of companies (see batch_pipeline); links and articles are then
+            resolved and extracted once for the whole batch, and stage slots are shared fairly with the other companies
+        :param batch_size: Articles per Gemini request; values above 1 enable batching mode (e.g. BATCH_SIZE).
+            Articles of the same date are then grouped as they arrive (see DateBatcher), and articles missing
+            from a batch response are retried individually
+        :param token_budget: Maximum estimated input tokens per request in batching mode
+        """
+        self.company_name = company_name
+        self.period = period
+        self.max_results = max_results
+        self.resolve_workers = resolve_workers
+        self.extract_workers = extract_workers
+        self.analyse_workers = analyse_workers
+        self.queue_size = queue_size
+        self.stateless = stateless
+        self.use_cache = use_cache
+        self.relevance_filter = relevance_filter
+        self.content_budget = ContentBudget(company_name, max_content_tokens) if max_content_tokens else None
+        self.near_duplicates = NearDuplicateIndex(max_day_gap=1 if stateless else 0) if near_duplicates else None
+        self.on_event = on_event
+        self.shared = shared
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+
+        self.stage_counts = defaultdict(int)
+        self.inp_tokens = 0
+        self.out_tokens = 0
+        self.saved_tokens = 0
+        self.timings = None
+
+    def token_usage(self):
+        """
+        :return: JSON-serialisable dictionary with the analysis mode, the Gemini tokens used, the tokens saved
+            by the analysis cache and the cost of the run.
+        """
+        return {
+            "mode": analysis_mode(self.stateless, self.batch_size > 1),
+            "input_tokens": self.inp_tokens,
+            "output_tokens": self.out_tokens,
+            "saved_tokens": round(self.saved_tokens),
+            "cost": round(self.inp_tokens * INPUT_PRICING + self.out_tokens * OUTPUT_PRICING, 2),
+        }
+
+    def _emit(self, event):
+        if self.on_event is not None:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                logger.error(f"Error in pipeline event callback: {e}", exc_info=True)
+
+    def _count(self, name):
+        self.stage_counts[name] += 1
+        self._emit({"type": "progress", "stage": name, "counts": dict(self.stage_counts)})
+
+    @asynccontextmanager
+    async def _fetchers(self):
+        """
+        Open the link resolver and HTTP session of a run, or use the batch's shared ones.
+
+        :return: Async context manager yielding the resolve_link(link) and fetch_content(url) coroutine functions.
+        """
+        if self.shared is not None:
+            yield (partial(self.shared.resolve_link, self.company_name),
+                   partial(self.shared.fetch_content, self.company_name))
+            return
+
+        async with GoogleNewsLinkResolverOptimized(max_pages=self.resolve_workers) as resolver, \
+                create_session() as session:
+            yield resolver.resolve_link, partial(extract_content_with_fallback, session=session)
+
+    def _gemini_slot(self):
+        return self.shared.slot("analyse", self.company_name) if self.shared is not None else nullcontext()
+
+    async def _run_stage(self, name, handler, inbox, outbox, concurrency, on_stop=None):
+        """
+        Run `concurrency` workers that apply `handler` to items from `inbox` and forward non-None results.
+
+        The stop sentinel is put back on the inbox by each worker so that one sentinel stops them all,
+        and is forwarded to the outbox once every worker has exited. `on_stop`, if given, is called by each
+        worker reaching the sentinel, i.e. once no more items will arrive.
+        """
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _STOP:
+                    inbox.put_nowait(_STOP)
+                    if on_stop is not None:
+                        on_stop()
+                    break
+
+                try:
+                    result = await handler(item)
+                except Exception as e:
+                    logger.error(f"Error in {name} stage: {e}", exc_info=True)
+                    result = None
+
+                if result is not None:
+                    self._count(name)
+                    if outbox is not None:
+                        await outbox.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        logger.info(f"Stage '{name}' finished: {self.stage_counts[name]} items passed.")
+        if outbox is not None:
+            await outbox.put(_STOP)
+
+    async def _produce_rss(self, outbox):
+        """
+        Feed RSS article rows into the resolve queue as each interval is fetched.
+        """
+        try:
+            async for article in iter_news_RSS_links(self.company_name, self.period, self.max_results):
+                self._count("rss")
+                await outbox.put(article)
+        except Exception as e:
+            logger.error(f"Error in rss stage: {e}", exc_info=True)
+        finally:
+            logger.info(f"Stage 'rss' finished: {self.stage_counts['rss']} items passed.")
+            await outbox.put(_STOP)
+
+    async def run(self):
+        """
+        Run the whole pipeline. Timers observed during the run are summarised in self.timings (see request_timings).
+
+        :return: DataFrame of analysed articles, in the same format as process_articles.
+        """
+        with request_timings() as self.timings:
+            return await self._run()
+
+    async def _run(self):
+        start_time = time.time()
+        resolve_q = asyncio.Queue(self.queue_size)
+        extract_q = asyncio.Queue(self.queue_size)
+        analyse_q = asyncio.Queue(self.queue_size)
+        results = []
+
+        def add_result(result):
+            # The event carries the result's position, which the final unique_ids refer to if they are reassigned
+            self._emit({"type": "article", "seq": len(results), "record": format_result_record(result)})
+            results.append(result)
+
+        # Chat history mode: one chat session per published date, used by one article at a time
+        # so that unique_id assignment stays consistent across a day's stories
+        config = model_config()
+        model = initiate_model(self.company_name, config)
+        fingerprint = prompt_fingerprint(self.company_name, config)
+        analysis_cache = get_analysis_cache() if self.use_cache else None
+        chat_sessions = {}
+        batch_fingerprint = batcher = None
+        if self.batch_size > 1:
+            batch_config = batch_model_config()
+            batch_model = initiate_model(self.company_name, batch_config)
+            batch_fingerprint = prompt_fingerprint(self.company_name, batch_config)
+            batch_sessions = {}
+        date_locks = defaultdict(asyncio.Lock)
+        # Result futures of near-duplicate cluster representatives, by resolved link
+        representative_results = {}
+
+        async with self._fetchers() as (resolve_link, fetch_content):
+
+            async def resolve(article):
+                resolved_link = await resolve_link(article["Link"])
+                if resolved_link is None:
+                    return None
+                return {**article, "ResolvedLink": resolved_link}
+
+            async def extract(article):
+                content = await fetch_content(article["ResolvedLink"])
+                if not content:
+                    return None
+                return {**article, "Content": content}
+
+            async def analyse(article):
+                if self.relevance_filter is not None and not self.relevance_filter.is_relevant(article):
+                    result = add_article_fields(default_result(article["Title"]), article)
+                    self._count("relevance_skipped")
+                    add_result(result)
+                    return result
+
+                if self.near_duplicates is None:
+                    return await score(article)
+
+                link = article["ResolvedLink"]
+                representative = self.near_duplicates.add(link, article["Title"], article["Content"], article["Published_Date"])
+                if representative in representative_results:
+                    representative_result = await representative_results[representative]
+                    if representative_result is None:
+                        return None
+                    result = add_article_fields({**representative_result, "headline": article["Title"]}, article)
+                    result["_cluster"] = representative
+                    representative_result["_cluster"] = representative
+                    self._count("near_duplicates")
+                    add_result(result)
+                    return result
+
+                representative_results[link] = asyncio.get_running_loop().create_future()
+                result = None
+                try:
+                    result = await score(article)
+                finally:
+                    representative_results[link].set_result(result)
+                return result
+
+            async def score_batch(articles):
+                curr_date = articles[0]["Published_Date"]
+                if self.stateless:
+                    async with self._gemini_slot():
+                        results, inp_tokens, out_tokens = await process_batch(articles, start_history(batch_model))
+                else:
+                    async with date_locks[curr_date]:
+                        if curr_date not in batch_sessions:
+                            batch_sessions[curr_date] = start_history(batch_model)
+                        async with self._gemini_slot():
+                            results, inp_tokens, out_tokens = await process_batch(articles, batch_sessions[curr_date])
+
+                self._count("gemini_batches")
+                self.inp_tokens += inp_tokens
+                self.out_tokens += out_tokens
+                return results
+
+            analyse_workers = self.analyse_workers
+            if self.batch_size > 1:
+                # Most analyse workers wait on their batch, so there are batch_size times more
+                analyse_workers *= self.batch_size
+                batcher = DateBatcher(score_batch, self.batch_size, self.token_budget, capacity=analyse_workers)
+
+            async def score(article):
+                curr_date = article["Published_Date"]
+                if self.content_budget is not None:
+                    article = {**article, "Content": self.content_budget.apply(article["Title"], article["Content"])}
+
+                entry = None
+                if analysis_cache is not None:
+                    # Batch results come from another prompt and schema, so they have their own key
+                    article = {**article, "AnalysisKey": AnalysisCache.key(self.company_name, fingerprint, article)}
+                    keys = [article["AnalysisKey"]]
+                    if batch_fingerprint is not None:
+                        article["BatchAnalysisKey"] = AnalysisCache.key(self.company_name, batch_fingerprint, article)
+                        keys.append(article["BatchAnalysisKey"])
+                    entries = await asyncio.to_thread(analysis_cache.get_many, keys)
+                    entry = entries.get(article["AnalysisKey"]) or entries.get(article.get("BatchAnalysisKey"))
+
+                if entry is not None:
+                    result, inp_tokens, out_tokens = cached_analysis(entry, article)
+                    self._count("analysis_cache_hits")
+                    self.saved_tokens += inp_tokens + out_tokens
+                    add_result(result)
+                    return result
+
+                if batcher is not None:
+                    result = await batcher.analyse(article)
+                    if result is not None:
+                        add_result(result)
+                        return result
+                    self._count("batch_retries")
+
+                if self.stateless:
+                    async with self._gemini_slot():
+                        result, inp_tokens, out_tokens = await process_article(article, start_history(model))
+                else:
+                    async with date_locks[curr_date]:
+                        if curr_date not in chat_sessions:
+                            chat_sessions[curr_date] = start_history(model)
+                        async with self._gemini_slot():
+                            result, inp_tokens, out_tokens = await process_article(article, chat_sessions[curr_date])
+
+                self.inp_tokens += inp_tokens
+                self.out_tokens += out_tokens
+                if result:
+                    add_result(result)
+                return result
+
+            await asyncio.gather(
+                self._produce_rss(resolve_q),
+                self._run_stage("resolve", resolve, resolve_q, extract_q, self.resolve_workers),
+                self._run_stage("extract", extract, extract_q, analyse_q, self.extract_workers),
+                self._run_stage("analyse", analyse, analyse_q, None, analyse_workers,
+                                on_stop=batcher.flush if batcher is not None else None),
+            )
+
+        logger.info(f"Total tokens used ({analysis_mode(self.stateless, batcher is not None)} mode): {self.inp_tokens + self.out_tokens} "
+                    f"(input {self.inp_tokens}, output {self.out_tokens}, about {self.saved_tokens:.0f} saved by the cache). "
+                    f"Total cost: Rs-{self.inp_tokens * INPUT_PRICING + self.out_tokens * OUTPUT_PRICING:.2f}.")
+        if self.relevance_filter is not None:
+            logger.info(f"Relevance filter: {self.relevance_filter.stats()['skipped']} Gemini calls saved "
+                        f"({self.relevance_filter.stats()}).")
+        if self.content_budget is not None:
+            logger.info(f"Content budget: {self.content_budget.stats()['truncated']} articles trimmed, "
+                        f"about {self.content_budget.stats()['tokens_saved']} input tokens saved.")
+        logger.info(f"Pipeline completed in {time.time() - start_time:.2f} seconds. Stage counts: {dict(self.stage_counts)}")
+
+        results_df = pd.DataFrame(results)
+        complete = {"type": "complete", "articles": len(results_df), "counts": dict(self.stage_counts),
+                    "elapsed": round(time.time() - start_time, 2), "timings": self.timings.summary(),
+                    "tokens": self.token_usage()}
+        if not results_df.empty:
+            # Without the day's history (stateless mode), or with cached analyses that were not part of it,
+            # the chat's story ids do not hold, so stories are grouped by headline instead
+            if self.stateless or self.stage_counts.get("analysis_cache_hits"):
+                results_df = assign_unique_ids(results_df, group_col="_cluster" if "_cluster" in results_df else None)
+                # Story ids of the streamed articles, in 'seq' order
+                complete["unique_ids"] = results_df["unique_id"].tolist()
+            results_df = results_df.sort_values(by="date", kind="stable").reset_index(drop=True)
+            results_df = results_df.drop(columns="_cluster", errors="ignore")
+        self._emit(complete)
+        return format_q_columns(results_df)
+
+    def run_sync(self):
+        """
+        Synchronous wrapper for running the pipeline.
+
+        :return: DataFrame of analysed articles.
+        """
+        return asyncio.run(self.run())
+
+    def iter_events(self):
+        """
+        Run the pipeline on a background thread and yield its events as they happen, for streaming
+        responses. Events are dictionaries with a 'type':
+
+        - 'progress': a stage passed another article; 'stage' and the 'counts' of all stages
+        - 'article': an analysed article 'record' (formatted like a row of the final DataFrame) and its 'seq'
+        - 'complete': the run finished; article count, stage counts, elapsed seconds, the 'timings' summary,
+          the 'tokens' used per analysis mode (see token_usage)
+          and, if story ids were reassigned after the run (stateless mode, or cache hits in chat history mode),
+          the 'unique_ids' of the streamed articles in 'seq' order
+        - 'error': the run failed; 'message'
+
+        Closing the generator early (e.g. when the client disconnects) cancels the run.
+
+        :return: Generator of event dictionaries.
+        """
+        events = queue.Queue()
+        running = {}
+        self.on_event = events.put
+
+        async def run():
+            running["loop"] = asyncio.get_running_loop()
+            running["task"] = asyncio.current_task()
+            await self.run()
+
+        def target():
+            try:
+                asyncio.run(run())
+            except asyncio.CancelledError:
+                logger.info("Pipeline run cancelled.")
+            except Exception as e:
+                logger.error(f"Pipeline run failed: {e}", exc_info=True)
+                events.put({"type": "error", "message": str(e)})
+            finally:
+                events.put(_STOP)
+
+        thread = threading.Thread(target=target, name="scrape-score-pipeline", daemon=True)
+        thread.start()
+        try:
+            while (event := events.get()) is not _STOP:
+                yield event
+        finally:
+            if thread.is_alive() and "loop" in running:
+                try:
+                    running["loop"].call_soon_threadsafe(running["task"].cancel)
+                except RuntimeError:
+                    pass  # The loop closed in the meantime
@@ -2,8 +2,8 @@ import pandas as pd
 import asyncio
 import aiohttp
 import time
-from trafilatura import extract
 import logging
+from utils.extraction_pool import extract_with_trafilatura_pooled
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -18,12 +18,12 @@ async def fetch_url_async(session, url):
         url (str): The URL to fetch.
 
     Returns:
-        str: The HTML content or None if the fetch fails.
+        bytes: The raw HTML content or None if the fetch fails.
     """
     try:
         async with session.get(url) as response:
             response.raise_for_status()
-            return await response.text()
+            return await response.read()
     except Exception as e:
         logger.error(f"Failed to fetch URL: {url}, Error: {str(e)}")
         return None
@@ -44,7 +44,8 @@ async def extract_content(url, session):
         if not page_content:
             raise ValueError(f"Failed to retrieve content from {url}")
 
-        tflr_content = extract(page_content)
+        # Parsed in the process pool so the event loop keeps downloading
+        tflr_content = await extract_with_trafilatura_pooled(page_content)
         
         if not tflr_content:
             raise ValueError("Trafilatura failed to extract content.")